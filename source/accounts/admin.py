@@ -0,0 +1,185 @@
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.db.models.functions import Lower
+from django.utils.crypto import get_random_string
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from .models import Activation, AuditEvent, User, users_updated
+from .utils import send_activation_email
+
+
+def estimate_count(queryset):
+    """Returns a cheap estimate of the number of rows in the table of the queryset."""
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table]
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+
+    # The largest primary key is an upper bound that is read from the index
+    return queryset.model._default_manager.aggregate(max_pk=Max("pk"))["max_pk"] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Avoids COUNT(*) over the whole table: unfiltered lists use an estimate, filtered
+    ones are counted up to ADMIN_COUNT_LIMIT rows. Pages ordered by the primary key
+    seek to their first key through the index instead of an OFFSET over full rows.
+    """
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            return estimate_count(self.object_list)
+
+        return self.object_list[: settings.ADMIN_COUNT_LIMIT].count()
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+
+        ordering = self.object_list.query.order_by
+        if bottom == 0 or tuple(ordering) not in (("pk",), ("-pk",)):
+            return super().page(number)
+
+        keys = self.object_list.values_list("pk", flat=True)
+        first_key = keys[bottom : bottom + 1].first()
+        if first_key is None:
+            return self._get_page([], number, self)
+
+        lookup = "pk__lte" if ordering[0] == "-pk" else "pk__gte"
+        objects = self.object_list.filter(**{lookup: first_key})[: self.per_page]
+
+        return self._get_page(objects, number, self)
+
+
+def iterate_batches(queryset, size=None):
+    """Yields the primary keys of the queryset in batches, using keyset pagination."""
+    size = size or settings.ADMIN_BATCH_SIZE
+    keys = queryset.order_by("pk").values_list("pk", flat=True)
+
+    last_key = None
+    while True:
+        batch = keys if last_key is None else keys.filter(pk__gt=last_key)
+        batch = list(batch[:size])
+        if not batch:
+            return
+
+        yield batch
+        last_key = batch[-1]
+
+
+def resend_activation_codes(request, user_ids):
+    emails = dict(
+        User.objects.filter(pk__in=user_ids, is_active=False).values_list("pk", "email")
+    )
+
+    Activation.objects.filter(user_id__in=emails).delete()
+    activations = Activation.objects.bulk_create(
+        Activation(code=get_random_string(20), user_id=pk) for pk in emails
+    )
+
+    for act in activations:
+        send_activation_email(request, emails[act.user_id], act.code)
+
+    return len(activations)
+
+
+class ScalableAdminMixin:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-pk",)
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class UserAdmin(ScalableAdminMixin, BaseUserAdmin):
+    search_help_text = _("Searches the beginning of the username or the email.")
+    actions = ["resend_activation", "deactivate"]
+
+    def get_search_results(self, request, queryset, search_term):
+        # Prefix matches on the normalized values are served by the expression
+        # indexes of the 0003 migration
+        term = search_term.strip().lower()
+        if not term:
+            return queryset, False
+
+        queryset = queryset.alias(
+            username_lower=Lower("username"), email_lower=Lower("email")
+        ).filter(Q(username_lower__startswith=term) | Q(email_lower__startswith=term))
+
+        return queryset, False
+
+    @admin.action(description=_("Resend activation codes to selected users"))
+    def resend_activation(self, request, queryset):
+        sent = sum(
+            resend_activation_codes(request, batch)
+            for batch in iterate_batches(queryset.filter(is_active=False))
+        )
+
+        self.message_user(
+            request, _("%(count)d activation codes sent.") % {"count": sent}
+        )
+
+    @admin.action(description=_("Deactivate selected users"))
+    def deactivate(self, request, queryset):
+        deactivated = 0
+        for batch in iterate_batches(queryset.filter(is_active=True)):
+            deactivated += User.objects.filter(pk__in=batch).update(is_active=False)
+            users_updated.send(sender=User, user_ids=batch)
+
+        self.message_user(
+            request,
+            _("%(count)d users deactivated.") % {"count": deactivated},
+            messages.SUCCESS,
+        )
+
+
+@admin.register(Activation)
+class ActivationAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ("code", "user", "email", "created_at")
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    search_fields = ("=code",)
+    actions = ["resend"]
+
+    @admin.action(description=_("Resend selected activation codes"))
+    def resend(self, request, queryset):
+        sent = 0
+        for batch in iterate_batches(queryset.filter(email="")):
+            user_ids = Activation.objects.filter(pk__in=batch).values_list(
+                "user_id", flat=True
+            )
+            sent += resend_activation_codes(request, list(user_ids))
+
+        self.message_user(
+            request, _("%(count)d activation codes sent.") % {"count": sent}
+        )
+
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ("created_at", "event", "user_id", "ip", "details")
+    # The event choices and the date ranges don't read the table, a date_hierarchy
+    # would scan it for the dates of its links. The events are ordered by the
+    # primary key of the mixin, which follows created_at
+    list_filter = ("event", ("created_at", admin.DateFieldListFilter))
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,269 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.forms import SetPasswordForm
+from django.contrib.auth.signals import user_logged_in
+from django.contrib.auth.tokens import default_token_generator
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils.translation import gettext_lazy as _
+from django.views.decorators.csrf import csrf_exempt
+from django.views.generic import View
+
+from . import audit
+from .forms import ChangeEmailForm, SignUpForm
+from .last_login import track_token
+from .models import Activation, AuditEvent, User, get_duplicate_field
+from .pow import CHALLENGE_FIELD, check_proof_of_work, make_challenge
+from .tokens import get_token_user, make_token, revoke_tokens
+from .utils import (
+    send_activation_change_email,
+    send_activation_email,
+    send_reset_password_email,
+)
+from .views import LogInView, RestorePasswordView
+
+
+def user_data(user):
+    return {
+        "id": user.pk,
+        "username": user.username,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+    }
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ApiView(View):
+    """
+    A JSON endpoint for the mobile and SPA clients. The clients authenticate with
+    bearer tokens, so the views never touch the session, messages or templates.
+    """
+
+    http_method_names = ["post"]
+    login_required = False
+    # Asks for a proof of work like the HTML forms, see proof_of_work_error()
+    proof_of_work = False
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            self.data = json.loads(request.body or b"{}")
+        except ValueError:
+            return self.error(_("The request body is not valid JSON."))
+
+        if not isinstance(self.data, dict):
+            return self.error(_("The request body is not valid JSON."))
+
+        self.user = self.get_bearer_user(request)
+        if self.login_required and not self.user:
+            return self.error(_("Authentication credentials were not provided."), 401)
+
+        if (
+            self.proof_of_work
+            and settings.POW_ENABLED
+            and not check_proof_of_work(request, type(self).__name__, self.data)
+        ):
+            return self.proof_of_work_error(request)
+
+        return super().dispatch(request, *args, **kwargs)
+
+    def proof_of_work_error(self, request):
+        """
+        Rejects a submission without a valid solution with the challenge to solve,
+        the client sends it back in the pow_challenge and pow_solution fields.
+        """
+        result = {"detail": _("The security check has failed or expired. Try again.")}
+
+        challenge = make_challenge(request, type(self).__name__)
+        if challenge:
+            result[CHALLENGE_FIELD], result["pow_difficulty"] = challenge
+
+        return JsonResponse(result, status=429)
+
+    @staticmethod
+    def log_in(request, user):
+        """
+        Returns a bearer token for the user, after sending user_logged_in like
+        django.contrib.auth.login() does, so last_login and the other receivers
+        work the same as for the HTML views.
+        """
+        user_logged_in.send(sender=type(user), request=request, user=user)
+
+        return make_token(user)
+
+    @staticmethod
+    def get_bearer_user(request):
+        header = request.headers.get("Authorization", "")
+        if not header.startswith("Bearer "):
+            return None
+
+        return get_token_user(header[len("Bearer ") :])
+
+    @staticmethod
+    def error(detail, status=400):
+        return JsonResponse({"detail": detail}, status=status)
+
+    @staticmethod
+    def form_error(form):
+        return JsonResponse({"errors": form.errors}, status=400)
+
+
+class ApiLogInView(ApiView):
+    def post(self, request):
+        form = LogInView.get_form_class()(data=self.data)
+        if not form.is_valid():
+            identifier = str(self.data.get(form.field_order[0], ""))
+            audit.record(AuditEvent.Event.LOG_IN_FAILED, request, details=identifier)
+            return self.form_error(form)
+
+        user: User = form.user_cache
+        token = self.log_in(request, user)
+        audit.record(AuditEvent.Event.LOG_IN, request, user)
+
+        return JsonResponse({"token": token, "user": user_data(user)})
+
+
+class ApiLogOutView(ApiView):
+    login_required = True
+
+    def post(self, request):
+        revoke_tokens(self.user)
+
+        return HttpResponse(status=204)
+
+
+class ApiSignUpView(ApiView):
+    proof_of_work = True
+
+    def post(self, request):
+        form = SignUpForm(data=self.data)
+        if not form.is_valid():
+            return self.form_error(form)
+
+        try:
+            user = form.save()
+        except IntegrityError as e:
+            if not form.add_duplicate_error(e):
+                raise
+            return self.form_error(form)
+
+        audit.record(AuditEvent.Event.SIGN_UP, request, user)
+
+        if settings.ENABLE_USER_ACTIVATION:
+            act = Activation.objects.issue(user)
+
+            send_activation_email(request, user.email, act.code)
+
+            return JsonResponse(
+                {"activation_required": True, "user": user_data(user)}, status=201
+            )
+
+        return JsonResponse(
+            {"token": self.log_in(request, user), "user": user_data(user)}, status=201
+        )
+
+
+class ApiActivateView(ApiView):
+    def post(self, request):
+        user_id = Activation.objects.activate(str(self.data.get("code", "")))
+        if not user_id:
+            return self.error(_("Activation code not found."), 404)
+
+        audit.record(AuditEvent.Event.ACTIVATION, request, user_id=user_id)
+
+        return JsonResponse({"id": user_id})
+
+
+class ApiRestorePasswordView(ApiView):
+    proof_of_work = True
+
+    def post(self, request):
+        form = RestorePasswordView.get_form_class()(data=self.data)
+        if not form.is_valid():
+            return self.form_error(form)
+
+        user: User = form.user_cache
+        token = default_token_generator.make_token(user)
+        track_token(user)
+        uid = urlsafe_base64_encode(force_bytes(user.pk))
+
+        send_reset_password_email(request, user.email, token, uid)
+        audit.record(AuditEvent.Event.PASSWORD_RESET_REQUEST, request, user)
+
+        return JsonResponse({}, status=202)
+
+
+class ApiRestorePasswordConfirmView(ApiView):
+    def post(self, request):
+        try:
+            user_id = force_str(urlsafe_base64_decode(str(self.data.get("uid", ""))))
+            user = User.objects.filter(pk=int(user_id)).first()
+        except ValueError:
+            user = None
+
+        token = str(self.data.get("token", ""))
+        if not user or not default_token_generator.check_token(user, token):
+            return self.error(_("The password reset link is invalid."))
+
+        form = SetPasswordForm(user, data=self.data)
+        if not form.is_valid():
+            return self.form_error(form)
+
+        form.save()
+        audit.record(AuditEvent.Event.PASSWORD_RESET, request, user)
+
+        return JsonResponse({})
+
+
+class ApiChangeEmailView(ApiView):
+    login_required = True
+
+    def post(self, request):
+        form = ChangeEmailForm(self.user, data=self.data)
+        if not form.is_valid():
+            return self.form_error(form)
+
+        email = form.cleaned_data["email"]
+
+        if settings.ENABLE_ACTIVATION_AFTER_EMAIL_CHANGE:
+            act = Activation.objects.issue(self.user, email=email)
+
+            send_activation_change_email(request, email, act.code)
+            audit.record(AuditEvent.Event.EMAIL_CHANGE_REQUEST, request, self.user)
+
+            return JsonResponse({"activation_required": True}, status=202)
+
+        self.user.email = email
+        try:
+            with transaction.atomic():
+                self.user.save(update_fields=["email"])
+        except IntegrityError as e:
+            if not form.add_duplicate_error(e):
+                raise
+            self.user.refresh_from_db(fields=["email"])
+            return self.form_error(form)
+
+        audit.record(AuditEvent.Event.EMAIL_CHANGE, request, self.user)
+
+        return JsonResponse({"user": user_data(self.user)})
+
+
+class ApiChangeEmailActivateView(ApiView):
+    def post(self, request):
+        try:
+            user_id = Activation.objects.change_email(str(self.data.get("code", "")))
+        except IntegrityError as e:
+            if get_duplicate_field(e) != "email":
+                raise
+            return self.error(_("You can not use this mail."))
+
+        if not user_id:
+            return self.error(_("Activation code not found."), 404)
+
+        audit.record(AuditEvent.Event.EMAIL_CHANGE, request, user_id=user_id)
+
+        return JsonResponse({"id": user_id})
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.utils import timezone
+
+from .buffers import FlushBuffer
+from .models import AuditEvent
+from .ratelimit import get_client_ip
+
+
+def write_events(events):
+    AuditEvent.objects.bulk_create(events)
+
+
+buffer = FlushBuffer(
+    write_events,
+    max_size=settings.AUDIT_BUFFER_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    interval=settings.AUDIT_FLUSH_INTERVAL,
+)
+
+
+def record(event, request=None, user=None, user_id=None, details=""):
+    """Buffers an audit event, the events are written in batches by `buffer`."""
+    if not settings.AUDIT_ENABLED:
+        return
+
+    ip = get_client_ip(request) if request else None
+
+    buffer.add(
+        AuditEvent(
+            created_at=timezone.now(),
+            event=event,
+            user_id=user.pk if user else user_id,
+            ip=ip or None,
+            details=details[:254],
+        )
+    )
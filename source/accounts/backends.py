@@ -0,0 +1,174 @@
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import SessionGeneration, User
+
+logger = logging.getLogger(__name__)
+
+
+def is_cache_shared():
+    """Tells whether the default cache is shared between the processes."""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache | DummyCache)
+
+
+class UserCache:
+    """
+    A two-tier cache of users: a per-process LRU in front of the shared Django cache.
+
+    Entries are stamped with a per-user version kept in the shared cache, so
+    bumping the version invalidates the user in every process at once. Without a
+    shared cache the invalidations can't reach the other processes, so users are
+    always loaded from the database.
+    """
+
+    def __init__(self):
+        self.local: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = {"local": 0, "shared": 0, "database": 0}
+        self.hits_lock = threading.Lock()
+
+    @staticmethod
+    def version_key(user_id):
+        return f"accounts:user:{user_id}:version"
+
+    @staticmethod
+    def user_key(user_id, version):
+        return f"accounts:user:{user_id}:{version}"
+
+    def get_version(self, user_id):
+        key = self.version_key(user_id)
+
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(key)
+
+        return version
+
+    def get(self, user_id, load_user):
+        if not is_cache_shared():
+            self.count("database")
+            return load_user(user_id)
+
+        version = self.get_version(user_id)
+
+        with self.lock:
+            entry = self.local.get(user_id)
+            if entry and entry[0] == version:
+                self.local.move_to_end(user_id)
+                user = entry[1]
+            else:
+                user = None
+
+        if user is not None:
+            self.count("local")
+            return self.clone(user)
+
+        key = self.user_key(user_id, version)
+        user = cache.get(key)
+        if user is None:
+            user = load_user(user_id)
+            if user is None:
+                return None
+
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+            self.count("database")
+        else:
+            self.count("shared")
+
+        with self.lock:
+            self.local[user_id] = (version, user)
+            self.local.move_to_end(user_id)
+            while len(self.local) > settings.USER_CACHE_SIZE:
+                self.local.popitem(last=False)
+
+        return self.clone(user)
+
+    @staticmethod
+    def clone(user):
+        """
+        Returns a copy of a cached user built from its field values, like a row
+        loaded from the database, so it shares nothing with the cached instance
+        (its _state, the permission caches set on it).
+        """
+        names = [field.attname for field in user._meta.concrete_fields]
+        clone = type(user).from_db(
+            user._state.db, names, [getattr(user, name) for name in names]
+        )
+
+        # The annotations of the loading query, such as session_generation
+        for name, value in vars(user).items():
+            if not name.startswith("_") and name not in names:
+                setattr(clone, name, value)
+
+        return clone
+
+    def invalidate(self, user_id):
+        # A new random version never collides with the stale entries
+        cache.set(self.version_key(user_id), uuid.uuid4().hex, timeout=None)
+
+        with self.lock:
+            self.local.pop(user_id, None)
+
+    def count(self, tier):
+        with self.hits_lock:
+            self.hits[tier] += 1
+            total = sum(self.hits.values())
+
+        if total % settings.USER_CACHE_STATS_INTERVAL == 0:
+            logger.info("User cache hit rates: %s", self.stats())
+
+    def stats(self):
+        with self.hits_lock:
+            hits = dict(self.hits)
+
+        total = sum(hits.values()) or 1
+        return {tier: round(count / total, 3) for tier, count in hits.items()}
+
+
+user_cache = UserCache()
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    Serves the user of every authenticated request from the user cache instead of
+    loading the row by primary key from the session on each request.
+    """
+
+    def get_user(self, user_id):
+        return user_cache.get(user_id, self.load_user)
+
+    def load_user(self, user_id):
+        generation = SessionGeneration.objects.filter(user=OuterRef("pk")).values(
+            "generation"
+        )
+
+        user: User | None = (
+            User._default_manager.annotate(
+                session_generation=Coalesce(Subquery(generation), Value(0))
+            )
+            .filter(pk=user_id)
+            .first()
+        )
+        if not user or not self.user_can_authenticate(user):
+            return None
+
+        return user
+
+
+def get_session_generation(user_id):
+    user = CachedModelBackend().get_user(user_id)
+    if not user:
+        return None
+
+    return user.session_generation
@@ -0,0 +1,616 @@
+import tempfile
+import time
+from collections import Counter
+from functools import partial
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import translation
+from django.utils.crypto import get_random_string
+
+from .models import Activation, User
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def create_user(**kwargs):
+    username = get_random_string(12)
+    return User.objects.create_user(
+        username, f"{username}@example.com", "bench-Pa55word!", **kwargs
+    )
+
+
+def measure(func, iterations):
+    """Returns the average time of a call in milliseconds and the queries per call."""
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - started
+
+    return elapsed * 1000 / iterations, len(queries) / iterations
+
+
+@benchmark
+def sessions(iterations):
+    """Session bytes and queries per authenticated request for each session engine."""
+    engines = ["django.contrib.sessions.backends.db", "accounts.sessions"]
+
+    for engine in engines:
+        with override_settings(SESSION_ENGINE=engine):
+            client = Client()
+            client.force_login(create_user())
+
+            cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+            stored = sum(
+                len(s.session_data) for s in Session.objects.filter(session_key=cookie)
+            )
+
+            duration, queries = measure(lambda: client.get("/"), iterations)
+
+        yield (
+            f"{engine}: cookie {len(cookie)} B, stored {stored} B, "
+            f"{queries:.2f} queries and {duration:.2f} ms per request"
+        )
+
+
+@benchmark
+def api(iterations):
+    """Throughput of the HTML log-in and sign-up views against the JSON API."""
+    with override_settings(
+        PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+        LOGIN_VIA_EMAIL=True,
+    ):
+        yield from compare_api(iterations)
+
+
+def compare_api(iterations):
+    user = create_user()
+    credentials = {"email": user.email, "password": "bench-Pa55word!"}
+
+    def sign_up_data():
+        username = get_random_string(12)
+        return {
+            "username": username,
+            "email": f"{username}@example.com",
+            "first_name": "Bench",
+            "last_name": "Mark",
+            "password1": "bench-Pa55word!",
+            "password2": "bench-Pa55word!",
+        }
+
+    cases = [
+        (
+            "log in (HTML)",
+            lambda: Client().post(reverse("accounts:log_in"), credentials),
+        ),
+        (
+            "log in (API)",
+            lambda: Client().post(
+                reverse("accounts:api_log_in"), credentials, "application/json"
+            ),
+        ),
+        (
+            "sign up (HTML)",
+            lambda: Client().post(reverse("accounts:sign_up"), sign_up_data()),
+        ),
+        (
+            "sign up (API)",
+            lambda: Client().post(
+                reverse("accounts:api_sign_up"), sign_up_data(), "application/json"
+            ),
+        ),
+    ]
+
+    yield "MD5 password hashing, so the framework overhead is not hidden by PBKDF2"
+    for name, func in cases:
+        duration, queries = measure(func, iterations)
+        yield (
+            f"{name}: {1000 / duration:.0f} requests/s, "
+            f"{queries:.2f} queries per request"
+        )
+
+
+@benchmark
+def writes(iterations):
+    """Queries of the activation, email change and profile update paths."""
+
+    def count_queries(func):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        return len(queries)
+
+    user = create_user(is_active=False)
+
+    code = Activation.objects.issue(user).code
+    activate = partial(Activation.objects.activate, code)
+    yield f"activate: {count_queries(activate)} queries"
+    yield f"activate again (double click): {count_queries(activate)} queries"
+
+    code = Activation.objects.issue(user, email="changed@example.com").code
+    change_email = partial(Activation.objects.change_email, code)
+    yield f"change email: {count_queries(change_email)} queries"
+
+    client = Client()
+    client.force_login(User.objects.get(pk=user.pk))
+    client.get("/")
+
+    data = {"first_name": "Bench", "last_name": "Mark"}
+    change_profile = partial(client.post, reverse("accounts:change_profile"), data)
+    yield f"change profile request: {count_queries(change_profile)} queries"
+
+
+@benchmark
+def forms(iterations):
+    """Rendering time of the accounts templates with prerendered form markup."""
+    from bootstrap4.forms import render_form
+
+    from . import forms
+    from .templatetags.accounts_forms import accounts_form
+
+    user = create_user(first_name="Bench", last_name="<Mark>")
+    request = RequestFactory().get("/")
+    request.user = user
+
+    cases = [
+        ("log_in.html", forms.SignInViaEmailOrUsernameForm()),
+        ("sign_up.html", forms.SignUpForm()),
+        ("remind_username.html", forms.RemindUsernameForm()),
+        ("resend_activation_code.html", forms.ResendActivationCodeForm()),
+        ("restore_password.html", forms.RestorePasswordForm()),
+        (
+            "profile/change_profile.html",
+            forms.ChangeProfileForm(
+                initial={"first_name": "Bench", "last_name": "<M>"}
+            ),
+        ),
+        (
+            "profile/change_email.html",
+            forms.ChangeEmailForm(user, initial={"email": user.email}),
+        ),
+    ]
+
+    for language, _ in settings.LANGUAGES:
+        with translation.override(language):
+            for name, form in cases:
+                if str(accounts_form(form)) != str(render_form(form)):
+                    yield f"{language} {name}: the markup differs from bootstrap_form"
+
+    for name, form in cases:
+        template_name = f"accounts/{name}"
+
+        def render_page():
+            return render_to_string(template_name, {"form": form}, request=request)
+
+        bootstrap, _ = measure(lambda: render_form(form), iterations)
+        prerendered, _ = measure(lambda: accounts_form(form), iterations)
+        page, _ = measure(render_page, iterations)
+
+        yield (
+            f"{name}: form {bootstrap:.3f} ms with bootstrap_form, "
+            f"{prerendered:.3f} ms prerendered, page {page:.3f} ms"
+        )
+
+
+@benchmark
+def last_login(iterations):
+    """Writes of last_login per 1,000 log-ins of 10 users."""
+    from django.contrib.auth import models as auth_models
+
+    from . import last_login
+
+    users = [create_user() for _ in range(10)]
+
+    def count_writes(receiver):
+        User.objects.update(last_login=None)
+
+        with CaptureQueriesContext(connection) as queries:
+            for i in range(1000):
+                # Every log-in loads the user again, like the authentication does
+                user = User.objects.get(pk=users[i % len(users)].pk)
+                receiver(User, user)
+            last_login.buffer.flush()
+
+        return sum(q["sql"].startswith("UPDATE") for q in queries)
+
+    cases = [
+        ("django", {}, auth_models.update_last_login),
+        (
+            "every log-in",
+            {"LAST_LOGIN_UPDATE_INTERVAL": 0},
+            last_login.update_last_login,
+        ),
+        ("throttled", {}, last_login.update_last_login),
+        (
+            "buffered",
+            {"LAST_LOGIN_UPDATE_INTERVAL": 0, "LAST_LOGIN_BUFFERED": True},
+            last_login.update_last_login,
+        ),
+    ]
+
+    # The writes are only throttled with a cache shared between the workers
+    with tempfile.TemporaryDirectory() as directory:
+        cache = {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": directory,
+        }
+        for name, overrides, receiver in cases:
+            with override_settings(CACHES={"default": cache}, **overrides):
+                yield f"{name}: {count_writes(receiver)} writes"
+
+
+@benchmark
+def proof_of_work(iterations):
+    """Time to solve a challenge and to verify the solution."""
+    from . import pow
+
+    request = RequestFactory().post("/", REMOTE_ADDR="127.0.0.1")
+
+    for difficulty in [12, 16]:
+        challenge = pow.get_signer(request, "bench").sign(f"{difficulty}:nonce")
+
+        started = time.perf_counter()
+        solution = 0
+        while not pow.is_solved(challenge, solution, difficulty):
+            solution += 1
+        solved = (time.perf_counter() - started) * 1000
+
+        def verify():
+            pow.get_signer(request, "bench").unsign(challenge)
+            pow.is_solved(challenge, solution, difficulty)
+
+        duration, _ = measure(verify, iterations)
+
+        yield (
+            f"{difficulty} bits: solved in {solved:.0f} ms ({solution} hashes), "
+            f"verified in {duration * 1000:.1f} us"
+        )
+
+
+@benchmark
+def concurrency(iterations):
+    """
+    A load test of the concurrency limiter: 48 clients against a simulated server
+    with 4 CPUs, where a log-in takes 40 ms of CPU and the index page 2 ms.
+    """
+    import statistics
+    import threading
+
+    from django.contrib.auth.models import AnonymousUser
+    from django.urls import resolve
+    from main.concurrency import ConcurrencyLimitMiddleware
+
+    cpus = threading.BoundedSemaphore(4)
+
+    def view(request):
+        with cpus:
+            time.sleep(0.04 if request.method == "POST" else 0.002)
+        return None
+
+    factory = RequestFactory()
+
+    def make_request(method, path):
+        # What a threaded server, the URL resolution and AuthenticationMiddleware
+        # give the limiter
+        request = getattr(factory, method)(path, **{"wsgi.multithread": True})
+        request.resolver_match = resolve(path)
+        request.user = AnonymousUser()
+        return request
+
+    requests = {
+        "log-in POST": partial(make_request, "post", reverse("accounts:log_in")),
+        "index": partial(make_request, "get", reverse("index")),
+    }
+
+    def run(handler):
+        latencies = {name: [] for name in requests}
+        shed = {name: 0 for name in requests}
+        deadline = time.monotonic() + 2
+
+        def client(name):
+            while time.monotonic() < deadline:
+                started = time.monotonic()
+                if handler(requests[name]()) is not None:
+                    shed[name] += 1
+                    time.sleep(0.01)
+                else:
+                    latencies[name].append(time.monotonic() - started)
+
+        # Most of the clients are bots hammering the log-in form
+        threads = [
+            threading.Thread(target=client, args=["log-in POST"]) for _ in range(40)
+        ]
+        threads += [threading.Thread(target=client, args=["index"]) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for name, values in latencies.items():
+            values.sort()
+            p99 = values[int(len(values) * 0.99)] * 1000 if values else 0
+            yield (
+                f"  {name}: {len(values)} served, {shed[name]} shed, "
+                f"p50 {statistics.median(values or [0]) * 1000:.0f} ms, p99 {p99:.0f} ms"
+            )
+
+    yield "without the limiter"
+    yield from run(view)
+
+    with override_settings(
+        CONCURRENCY_LIMIT_ENABLED=True, CONCURRENCY_LATENCY_TARGET=0.1
+    ):
+
+        def get_response(request):
+            return middleware.process_view(request, view, (), {}) or view(request)
+
+        middleware = ConcurrencyLimitMiddleware(get_response)
+
+        yield "with the limiter"
+        yield from run(middleware)
+        yield f"  final limit {middleware.limit.limit:.1f}"
+
+
+@benchmark
+def locale(iterations):
+    """Language negotiation of mixed-language traffic by both locale middlewares."""
+    from django.middleware.locale import LocaleMiddleware as DjangoLocaleMiddleware
+    from main.locale import LocaleMiddleware
+
+    headers = [
+        "en-US,en;q=0.9",
+        "zh-CN,zh;q=0.9,en;q=0.8",
+        "fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7",
+        "es-ES,es;q=0.9",
+        "de-DE,de;q=0.9,en;q=0.5",
+        "zh-Hans-CN;q=0.9,zh-Hant;q=0.8",
+        "",
+    ]
+    factory = RequestFactory()
+    requests = [factory.get("/", HTTP_ACCEPT_LANGUAGE=header) for header in headers]
+    requests.append(factory.get("/"))
+    requests[-1].COOKIES[settings.LANGUAGE_COOKIE_NAME] = "fr"
+
+    for middleware_class in [DjangoLocaleMiddleware, LocaleMiddleware]:
+        middleware = middleware_class(lambda request: None)
+        languages = set()
+
+        def negotiate():
+            for request in requests:
+                middleware.process_request(request)
+                languages.add(request.LANGUAGE_CODE)
+
+        duration, _ = measure(negotiate, iterations)
+        translation.deactivate()
+
+        yield (
+            f"{middleware_class.__module__}: {duration * 1000 / len(requests):.1f} us "
+            f"per request, languages {sorted(languages)}"
+        )
+
+
+@benchmark
+def password_validators(iterations):
+    """Equivalence and cost of the accounts password validators against Django's."""
+    import random
+
+    from django.contrib.auth import password_validation
+    from django.core.exceptions import ValidationError
+
+    from . import validators
+
+    def outcomes(validator, cases):
+        results = []
+        for password, user in cases:
+            try:
+                validator.validate(password, user)
+            except ValidationError as e:
+                results.append(e.messages[0])
+            else:
+                results.append(None)
+        return results
+
+    rng = random.Random(42)
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789.-_@ "
+
+    def random_string(length):
+        return "".join(rng.choice(alphabet) for _ in range(length))
+
+    common = sorted(
+        validators.read_word_list(
+            validators.compile_word_list(
+                password_validation.CommonPasswordValidator().DEFAULT_PASSWORD_LIST_PATH
+            )
+        )
+    )
+    common_cases = [(word, None) for word in common[::10]]
+    common_cases += [(f" {word.upper()} ", None) for word in common[::97]]
+    common_cases += [(random_string(rng.randint(0, 16)), None) for _ in range(2000)]
+
+    users = []
+    for _ in range(50):
+        username = random_string(rng.randint(3, 12))
+        users.append(
+            User(
+                username=username,
+                email=f"{username}@{random_string(6)}.com",
+                first_name=random_string(rng.randint(0, 8)),
+                last_name=random_string(rng.randint(0, 10)),
+            )
+        )
+    similarity_cases = []
+    for user in users:
+        similarity_cases += [
+            (user.username, user),
+            (user.username[::-1] + "1", user),
+            (user.email.upper(), user),
+            ("".join(rng.sample(user.email, len(user.email))), user),
+            (random_string(rng.randint(4, 20)), user),
+            (random_string(200), user),
+        ]
+
+    cases = [
+        (
+            "common",
+            password_validation.CommonPasswordValidator,
+            validators.CommonPasswordValidator,
+            common_cases,
+        ),
+        (
+            "similarity",
+            password_validation.UserAttributeSimilarityValidator,
+            validators.UserAttributeSimilarityValidator,
+            similarity_cases,
+        ),
+    ]
+
+    for name, django_class, accounts_class, validator_cases in cases:
+        expected = outcomes(django_class(), validator_cases)
+        rejected = sum(e is not None for e in expected)
+        yield f"{name}: {len(validator_cases)} passwords, {rejected} rejected"
+
+        variants = [
+            ("django", django_class, {}),
+            ("accounts", accounts_class, {}),
+        ]
+        if accounts_class is validators.CommonPasswordValidator:
+            variants.append(
+                ("accounts mmap", accounts_class, {"PASSWORD_LIST_MMAP_SIZE": 0})
+            )
+
+        for variant, validator_class, overrides in variants:
+            with override_settings(**overrides):
+                started = time.perf_counter()
+                validator = validator_class()
+                created = (time.perf_counter() - started) * 1000
+
+            duration, _ = measure(
+                partial(outcomes, validator, validator_cases), iterations
+            )
+            actual = outcomes(validator, validator_cases)
+            mismatches = sum(a != b for a, b in zip(expected, actual))
+
+            yield (
+                f"  {variant}: created in {created:.1f} ms, "
+                f"{duration * 1000 / len(validator_cases):.1f} us per password, "
+                f"{mismatches} mismatches"
+            )
+
+
+@benchmark
+def breached_passwords(iterations):
+    """Lookups in a breached passwords file of a million hashes."""
+    import hashlib
+    import os
+    import random
+    import tempfile
+
+    from .breached import BreachedPasswords, write_file
+    from .validators import BreachedPasswordValidator
+
+    rng = random.Random(42)
+    breached = [f"breached-{i}" for i in range(1000)]
+    hashes = [hashlib.sha1(p.encode()).digest() for p in breached]
+    hashes += [rng.randbytes(20) for _ in range(1_000_000 - len(breached))]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "breached.bin")
+        count = write_file(path, sorted(hashes), hash_size=10)
+
+        started = time.perf_counter()
+        validator = BreachedPasswordValidator(path)
+        opened = (time.perf_counter() - started) * 1000
+        passwords: BreachedPasswords = validator.passwords
+
+        yield (
+            f"{count} hashes, {os.path.getsize(path) // 1024} KB, "
+            f"opened in {opened:.2f} ms"
+        )
+
+        found = sum(password in passwords for password in breached)
+        false = sum(f"safe-{i}" in passwords for i in range(10000))
+        yield f"{found} of {len(breached)} breached found, {false} false positives"
+
+        candidates = breached[:100] + [f"safe-{i}" for i in range(100)]
+        duration, _ = measure(
+            lambda: [password in passwords for password in candidates], iterations
+        )
+        yield f"{duration * 1000 / len(candidates):.2f} us per lookup"
+
+
+@benchmark
+def concurrent_sign_up(iterations):
+    """Sign-ups racing for one email in different cases, and the queries of a sign-up."""
+    import threading
+
+    from django.db import IntegrityError, OperationalError, close_old_connections
+
+    from .forms import SignUpForm
+
+    def sign_up_data(email):
+        username = get_random_string(12)
+        return {
+            "username": username,
+            "email": email,
+            "password1": "bench-Pa55word!",
+            "password2": "bench-Pa55word!",
+        }
+
+    with override_settings(
+        PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]
+    ):
+        for round_number in range(3):
+            email = f"race-{round_number}@example.com"
+            forms = [
+                SignUpForm(sign_up_data(email.upper() if i % 2 else email))
+                for i in range(8)
+            ]
+            # Every form passes the validation before any of them is saved
+            valid = sum(form.is_valid() for form in forms)
+
+            outcomes = []
+            barrier = threading.Barrier(len(forms))
+
+            def save(form):
+                barrier.wait()
+                try:
+                    # The shared in-memory SQLite test database locks whole tables
+                    for _ in range(50):
+                        try:
+                            form.save()
+                        except OperationalError:
+                            time.sleep(0.01)
+                        else:
+                            outcomes.append("created")
+                            break
+                except IntegrityError as e:
+                    form.add_duplicate_error(e)
+                    outcomes.append(form.errors["email"][0])
+                finally:
+                    close_old_connections()
+
+            threads = [threading.Thread(target=save, args=[form]) for form in forms]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            stored = User.objects.filter(email__iexact=email).count()
+            summary = ", ".join(f"{n} x {o}" for o, n in Counter(outcomes).items())
+            yield f"{valid} valid forms: {summary}; {stored} users stored"
+
+        client = Client()
+        url = reverse("accounts:sign_up")
+        with CaptureQueriesContext(connection) as queries:
+            client.post(url, sign_up_data(f"{get_random_string(12)}@example.com"))
+        yield f"sign-up request: {len(queries)} queries"
@@ -0,0 +1,111 @@
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+
+HEADER = struct.Struct("<4sIQ")
+MAGIC = b"BRH1"
+
+# The first two bytes of a hash select a bucket, the index holds the number of the
+# first record of every bucket and the total number of records
+PREFIXES = 1 << 16
+INDEX = struct.Struct(f"<{PREFIXES + 1}Q")
+
+
+def hash_password(password):
+    return hashlib.sha1(password.encode()).digest()
+
+
+class BreachedPasswords:
+    """
+    A sorted file of truncated SHA-1 hashes of breached passwords, searched in place
+    through mmap so every worker shares the same pages.
+
+    The layout is a header (magic, hash size, record count), the bucket index and
+    the fixed-size records.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size + INDEX.size:
+                raise ValueError(f"{path} isn't a breached passwords file.")
+
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.hash_size, self.count = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or not 4 <= self.hash_size <= 20:
+            raise ValueError(f"{path} isn't a breached passwords file.")
+
+        self.offset = HEADER.size + INDEX.size
+        if len(self.buffer) != self.offset + self.count * self.hash_size:
+            raise ValueError(f"{path} is truncated.")
+
+    def get_record(self, number):
+        start = self.offset + number * self.hash_size
+        return self.buffer[start : start + self.hash_size]
+
+    def __contains__(self, password):
+        key = hash_password(password)[: self.hash_size]
+
+        prefix = int.from_bytes(key[:2], "big")
+        low, high = struct.unpack_from("<2Q", self.buffer, HEADER.size + prefix * 8)
+
+        while low < high:
+            middle = (low + high) // 2
+            record = self.get_record(middle)
+            if record == key:
+                return True
+
+            if record < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return False
+
+
+def write_file(path, hashes, hash_size):
+    """
+    Writes the sorted, truncated `hashes` into a breached passwords file, replacing
+    `path` atomically. The hashes must come in ascending order, the duplicates left
+    by the truncation are skipped. Returns the number of records.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory)
+
+    index = [0] * (PREFIXES + 1)
+    count = 0
+    previous = b""
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.seek(HEADER.size + INDEX.size)
+
+            for digest in hashes:
+                record = digest[:hash_size]
+                if record == previous:
+                    continue
+                if record < previous:
+                    raise ValueError("The hashes aren't sorted.")
+
+                index[int.from_bytes(record[:2], "big") + 1] += 1
+                f.write(record)
+                previous = record
+                count += 1
+
+            # Turn the bucket sizes into the numbers of their first records
+            for prefix in range(PREFIXES):
+                index[prefix + 1] += index[prefix]
+
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, hash_size, count))
+            f.write(INDEX.pack(*index))
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+    return count
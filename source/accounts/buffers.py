@@ -0,0 +1,75 @@
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class FlushBuffer:
+    """
+    A bounded in-process buffer that a background thread flushes in batches, when
+    `batch_size` items are waiting or every `interval` seconds, and on shutdown.
+
+    When the buffer is full new items are dropped and counted instead of blocking
+    the requests. The thread and the flush at exit start with the first item.
+    """
+
+    def __init__(self, flush, max_size, batch_size, interval):
+        self.write = flush
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.interval = interval
+
+        self.items: deque = deque()
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.pid = None
+
+    def add(self, item):
+        with self.lock:
+            if len(self.items) >= self.max_size:
+                self.dropped += 1
+                if self.dropped % 1000 == 1:
+                    logger.warning("%s dropped %d items", self, self.dropped)
+                return False
+
+            self.items.append(item)
+            is_full = len(self.items) >= self.batch_size
+
+            # The thread doesn't survive a fork, start it in every worker. The exit
+            # handler does, it's registered once
+            if self.pid != os.getpid():
+                if self.pid is None:
+                    atexit.register(self.flush)
+                self.pid = os.getpid()
+                threading.Thread(target=self.run, daemon=True).start()
+
+        if is_full:
+            self.wakeup.set()
+
+        return True
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            if not self.items:
+                return
+            batch = list(self.items)
+            self.items.clear()
+
+        close_old_connections()
+        try:
+            for start in range(0, len(batch), self.batch_size):
+                self.write(batch[start : start + self.batch_size])
+        except Exception:
+            logger.exception("%s failed to flush %d items", self, len(batch))
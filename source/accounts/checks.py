@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core import checks
+
+from .backends import is_cache_shared
+from .existence import existence_index
+
+
+@checks.register(checks.Tags.caches)
+def check_proof_of_work_cache(app_configs, **kwargs):
+    # The spent challenges are recorded in the cache, a per-process cache would let
+    # a solution be replayed once in every worker
+    if settings.POW_ENABLED and not is_cache_shared():
+        return [
+            checks.Error(
+                "POW_ENABLED requires a cache shared by all the processes.",
+                hint="Configure CACHES with a shared backend such as Redis.",
+                id="accounts.E001",
+            )
+        ]
+
+    return []
+
+
+@checks.register()
+def check_existence_index(app_configs, **kwargs):
+    # The workers don't build the file, until it exists the index is unused
+    if existence_index.is_shared() and not existence_index.is_valid_file(
+        settings.EXISTENCE_INDEX_PATH, *existence_index.get_size()
+    ):
+        return [
+            checks.Warning(
+                "The existence index file is missing or was built with other "
+                "settings, the sign-up form doesn't use it.",
+                hint="Run `manage.py rebuild_existence_index`.",
+                id="accounts.W001",
+            )
+        ]
+
+    return []
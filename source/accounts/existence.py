@@ -0,0 +1,257 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import User
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+HEADER = struct.Struct("<4sIQ")
+MAGIC = b"BLM1"
+
+
+class BloomFilter:
+    """
+    A Bloom filter over a writable buffer, a bytearray or a shared memory map.
+
+    A value that was added is always reported as present, a value that was not
+    added is reported as present with the configured error rate.
+    """
+
+    def __init__(self, buffer, num_bits, num_hashes, offset=0):
+        self.buffer = buffer
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.offset = offset
+
+    @staticmethod
+    def get_size(capacity, error_rate):
+        num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return num_bits, num_hashes
+
+    def get_positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = struct.unpack("<QQ", digest)
+        for i in range(self.num_hashes):
+            yield (first + i * second) % self.num_bits
+
+    def add(self, value):
+        for position in self.get_positions(value):
+            self.buffer[self.offset + position // 8] |= 1 << position % 8
+
+    def __contains__(self, value):
+        return all(
+            self.buffer[self.offset + position // 8] & 1 << position % 8
+            for position in self.get_positions(value)
+        )
+
+
+class ExistenceIndex:
+    """
+    An index of the normalized emails and usernames of all users, so the sign-up
+    form only queries the database for identifiers that may be taken.
+
+    The filter lives in the memory-mapped file at EXISTENCE_INDEX_PATH, shared by all
+    the workers on the node and kept up to date by the post_save signal. The file is
+    built by `manage.py rebuild_existence_index`, never on the request path: until
+    it exists, or without the path, every identifier may be taken.
+    """
+
+    def __init__(self):
+        self.filter: BloomFilter | None = None
+        self.file = None
+        self.lock_file = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_values(username, email):
+        if username:
+            yield f"username:{username.lower()}"
+        if email:
+            yield f"email:{email.lower()}"
+
+    @staticmethod
+    def get_size():
+        return BloomFilter.get_size(
+            settings.EXISTENCE_INDEX_CAPACITY, settings.EXISTENCE_INDEX_ERROR_RATE
+        )
+
+    @contextmanager
+    def file_lock(self, path):
+        """
+        Serializes the adds and the rebuilds of all the processes, so an add can't
+        go to a file that a rebuild is about to replace.
+        """
+        if not fcntl:
+            yield
+            return
+
+        lock_path = f"{path}.lock"
+        if self.lock_file is None or self.lock_file.name != lock_path:
+            self.lock_file = open(lock_path, "ab")
+
+        fcntl.lockf(self.lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self.lock_file, fcntl.LOCK_UN)
+
+    def get_filter(self):
+        """Returns the mapped filter or None if the file isn't built, under the lock."""
+        if self.filter is None or self.is_replaced():
+            self.filter = self.load()
+
+        return self.filter
+
+    def is_replaced(self):
+        # Another process has rebuilt the shared file, map the new one
+        if not self.file:
+            return False
+
+        try:
+            return os.fstat(self.file.fileno()).st_ino != os.stat(self.file.name).st_ino
+        except FileNotFoundError:
+            return True
+
+    def load(self):
+        self.close()
+
+        path = settings.EXISTENCE_INDEX_PATH
+        num_bits, num_hashes = self.get_size()
+        if not self.is_valid_file(path, num_bits, num_hashes):
+            return None
+
+        self.file = open(path, "r+b")
+        buffer = mmap.mmap(self.file.fileno(), 0)
+        return BloomFilter(buffer, num_bits, num_hashes, offset=HEADER.size)
+
+    def close(self):
+        if self.filter is not None:
+            self.filter.buffer.close()
+            self.filter = None
+
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    @staticmethod
+    def is_valid_file(path, num_bits, num_hashes):
+        try:
+            with open(path, "rb") as file:
+                header = file.read(HEADER.size)
+        except FileNotFoundError:
+            return False
+
+        return header == HEADER.pack(MAGIC, num_hashes, num_bits)
+
+    def build_file(self, path, num_bits, num_hashes):
+        buffer = bytearray(HEADER.size + math.ceil(num_bits / 8))
+        HEADER.pack_into(buffer, 0, MAGIC, num_hashes, num_bits)
+        self.fill(BloomFilter(buffer, num_bits, num_hashes, offset=HEADER.size))
+
+        # Replace the file atomically, the workers that mapped the old one notice
+        # the new inode on their next lookup
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+            file.write(buffer)
+        os.replace(file.name, path)
+
+    @staticmethod
+    def fill(bloom):
+        users = User.objects.values_list("username", "email").iterator(chunk_size=2000)
+        for username, email in users:
+            for value in ExistenceIndex.get_values(username, email):
+                bloom.add(value)
+
+    def rebuild(self):
+        path = settings.EXISTENCE_INDEX_PATH
+
+        # The adds of the other processes wait for the new file and go to it
+        with self.lock, self.file_lock(path):
+            self.build_file(path, *self.get_size())
+            self.close()
+
+    def add(self, username=None, email=None):
+        if not self.is_shared():
+            return
+
+        with self.lock, self.file_lock(settings.EXISTENCE_INDEX_PATH):
+            # A file that is not built yet will stream the user anyway
+            bloom = self.get_filter()
+            if bloom is None:
+                return
+
+            for value in self.get_values(username, email):
+                bloom.add(value)
+
+    @staticmethod
+    def is_shared():
+        return settings.USE_EXISTENCE_INDEX and bool(settings.EXISTENCE_INDEX_PATH)
+
+    def is_new_username(self, username):
+        """Tells whether the username is definitely not taken by any user."""
+        return not self.might_contain_username(username)
+
+    def is_new_email(self, email):
+        """Tells whether the email is definitely not taken by any user."""
+        return not self.might_contain_email(email)
+
+    def might_contain(self, value):
+        if not self.is_shared():
+            return True
+
+        # Looked up under the lock, a rebuild in another thread closes the old map
+        with self.lock:
+            bloom = self.get_filter()
+            return bloom is None or value in bloom
+
+    def might_contain_username(self, username):
+        return self.might_contain(f"username:{username.lower()}")
+
+    def might_contain_email(self, email):
+        return self.might_contain(f"email:{email.lower()}")
+
+
+existence_index = ExistenceIndex()
+
+
+def is_available(kind, value):
+    """
+    Tells whether a username or an email is free through the existence index, then
+    a short-lived cache of the database answers. The answer is only a hint, the
+    sign-up form validates the identifiers again.
+    """
+    value = value.lower()
+
+    if kind == "username":
+        might_exist = existence_index.might_contain_username(value)
+        lookup = {"username__iexact": value}
+    else:
+        might_exist = existence_index.might_contain_email(value)
+        lookup = {"email__iexact": value}
+
+    # Not cached, the next lookup sees the adds that reach the filter meanwhile
+    if not might_exist:
+        return True
+
+    digest = hashlib.md5(value.encode()).hexdigest()
+    cache_key = f"accounts:available:{kind}:{digest}"
+
+    available = cache.get(cache_key)
+    if available is None:
+        available = not User.objects.filter(**lookup).exists()
+        cache.set(cache_key, available, settings.AVAILABILITY_CACHE_TIMEOUT)
+
+    return available
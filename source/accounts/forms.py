@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.contrib.auth.forms import UserCreationForm
+from django.db import transaction
 from django.db.models import Q
 from django.forms import (
     BooleanField,
@@ -12,9 +13,11 @@ from django.forms import (
     ValidationError,
 )
 from django.utils import timezone
+from django.utils.crypto import get_random_string
 from django.utils.translation import gettext_lazy as _
 
-from .models import Activation, User
+from .existence import existence_index
+from .models import Activation, User, get_duplicate_field, has_unique_email_index
 
 
 class UserCacheMixin:
@@ -139,15 +142,86 @@ class SignUpForm(UserCreationForm):
         label=_("Email"), help_text=_("Required. Enter an existing email address.")
     )
 
+    # Set when the existence index proves the username is new
+    username_is_new = False
+
+    def clean_username(self):
+        username = self.cleaned_data.get("username")
+
+        # Definitely new usernames skip both uniqueness queries, a username taken in
+        # the meantime is rejected on insert, see add_duplicate_error()
+        if username and existence_index.is_new_username(username):
+            self.username_is_new = True
+            return username
+
+        return super().clean_username()
+
     def clean_email(self):
         email = self.cleaned_data["email"]
 
+        # The database rejects the duplicates on insert, see add_duplicate_error()
+        if has_unique_email_index():
+            return email
+
+        if existence_index.is_new_email(email):
+            return email
+
         user = User.objects.filter(email__iexact=email).exists()
         if user:
             raise ValidationError(_("You can not use this email address."))
 
         return email
 
+    def validate_unique(self):
+        exclude = self._get_validation_exclusions()
+        if self.username_is_new:
+            exclude.add("username")
+
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as e:
+            self._update_errors(e)
+
+    def save(self, commit=True):
+        user = super().save(commit=False)
+
+        if settings.DISABLE_USERNAME:
+            # Set a temporary username
+            user.username = get_random_string(length=20)
+
+        if settings.ENABLE_USER_ACTIVATION:
+            user.is_active = False
+
+        if not commit:
+            return user
+
+        with transaction.atomic():
+            # Create a user record
+            user.save()
+
+            # Change the username to the "user_ID" form
+            if settings.DISABLE_USERNAME:
+                user.username = f"user_{user.id}"
+                user.save(update_fields=["username"])
+
+        return user
+
+    def add_duplicate_error(self, error):
+        """
+        Turns a unique violation raised by save() into the error the validation would
+        give, returns False for the other integrity errors.
+        """
+        field = get_duplicate_field(error)
+        if field not in self.fields:
+            return False
+
+        if field == "email":
+            self.add_error("email", _("You can not use this email address."))
+        else:
+            self.add_error(field, self.instance.unique_error_message(User, [field]))
+
+        return True
+
 
 class ResendActivationCodeForm(UserCacheMixin, Form):
     email_or_username = CharField(label=_("Email or Username"))
@@ -241,6 +315,15 @@ class ChangeEmailForm(Form):
         if email == self.user.email:
             raise ValidationError(_("Please enter another email."))
 
+        # The database rejects the duplicates on update, see add_duplicate_error().
+        # With the activation the email is only written when the link is opened, the
+        # query avoids sending it for a taken address and the index stays the backstop
+        if (
+            has_unique_email_index()
+            and not settings.ENABLE_ACTIVATION_AFTER_EMAIL_CHANGE
+        ):
+            return email
+
         user = User.objects.filter(
             Q(email__iexact=email) & ~Q(id=self.user.id)
         ).exists()
@@ -249,6 +332,18 @@ class ChangeEmailForm(Form):
 
         return email
 
+    def add_duplicate_error(self, error):
+        if get_duplicate_field(error) != "email":
+            return False
+
+        self.add_error("email", _("You can not use this mail."))
+        return True
+
 
 class RemindUsernameForm(EmailForm):
     pass
+
+
+class LogInViaLinkForm(Form):
+    # Not checked against the users, the answer is the same for every address
+    email = EmailField(label=_("Email"))
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .backends import is_cache_shared
+from .buffers import FlushBuffer
+from .models import User, users_updated
+
+
+def write_last_logins(items):
+    # Only the latest log-in of every user is written, in one statement per batch
+    latest = {}
+    for user_id, logged_in_at in items:
+        latest[user_id] = max(logged_in_at, latest.get(user_id, logged_in_at))
+
+    users = [User(pk=pk, last_login=last_login) for pk, last_login in latest.items()]
+    User.objects.bulk_update(users, ["last_login"])
+
+    # The cached users would write the old value back on their next save()
+    users_updated.send(sender=User, user_ids=list(latest))
+
+
+buffer = FlushBuffer(
+    write_last_logins,
+    max_size=settings.LAST_LOGIN_BUFFER_SIZE,
+    batch_size=settings.LAST_LOGIN_BATCH_SIZE,
+    interval=settings.LAST_LOGIN_FLUSH_INTERVAL,
+)
+
+
+def get_token_key(user_id):
+    return f"accounts:last_login:token:{user_id}"
+
+
+def track_token(user):
+    """
+    Makes the next log-in of the user write last_login right away. The password
+    reset and log-in link tokens issued before it are invalidated by the change.
+    """
+    timeout = max(settings.PASSWORD_RESET_TIMEOUT, settings.LOGIN_LINK_TIMEOUT)
+    cache.set(get_token_key(user.pk), True, timeout)
+
+
+def update_last_login(sender, user, **kwargs):
+    """
+    A replacement of `django.contrib.auth.models.update_last_login` that skips the
+    write when the stored value is younger than LAST_LOGIN_UPDATE_INTERVAL seconds
+    and optionally buffers it.
+
+    The users with outstanding tokens, and all the users without a shared cache to
+    keep track of them, are written through on every log-in.
+    """
+    now = timezone.now()
+
+    key = get_token_key(user.pk)
+    write_through = not is_cache_shared() or cache.get(key)
+
+    interval = timedelta(seconds=settings.LAST_LOGIN_UPDATE_INTERVAL)
+    if not write_through and user.last_login and now - user.last_login < interval:
+        return
+
+    user.last_login = now
+
+    if settings.LAST_LOGIN_BUFFERED and not write_through:
+        buffer.add((user.pk, now))
+    else:
+        User.objects.filter(pk=user.pk).update(last_login=now)
+        users_updated.send(sender=User, user_ids=[user.pk])
+        cache.delete(key)
@@ -0,0 +1,96 @@
+import gzip
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.breached import hash_password, write_file
+
+# A SHA-1 hash in hexadecimal, with the optional count of the HIBP format
+LINE_RE = re.compile(r"([0-9A-Fa-f]{40})(?::(\d+))?")
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the breached passwords file from a text dump: SHA-1 hashes, one per "
+        "line and ordered by hash (the HIBP 'HASH:COUNT' format is accepted), or "
+        "plain passwords with --passwords."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Text dump, may be gzipped.")
+        parser.add_argument("output", help="Path of the breached passwords file.")
+        parser.add_argument(
+            "--hash-size",
+            type=int,
+            default=10,
+            help="Bytes kept of every SHA-1 hash (4-20).",
+        )
+        parser.add_argument(
+            "--min-count",
+            type=int,
+            default=1,
+            help="Skip the hashes seen fewer times in breaches.",
+        )
+        parser.add_argument(
+            "--skip-invalid",
+            action="store_true",
+            help="Skip the lines that aren't SHA-1 hashes with a warning instead of "
+            "failing.",
+        )
+        parser.add_argument(
+            "--passwords",
+            action="store_true",
+            help="The dump holds plain passwords, they are hashed and sorted in memory.",
+        )
+
+    @staticmethod
+    def open(path):
+        if path.endswith(".gz"):
+            return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+
+        return open(path, encoding="utf-8", errors="replace")
+
+    def read_hashes(self, lines, min_count, skip_invalid):
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            # A hash of another kind or a truncated line could never match
+            match = LINE_RE.fullmatch(line)
+            if not match:
+                message = f"Line {number} isn't a SHA-1 hash: {line[:50]!r}"
+                if not skip_invalid:
+                    raise CommandError(f"{message}.")
+
+                self.stderr.write(self.style.WARNING(f"{message}, skipped."))
+                continue
+
+            digest, count = match.groups()
+            if count and int(count) < min_count:
+                continue
+
+            yield bytes.fromhex(digest)
+
+    def handle(self, *args, **options):
+        hash_size = options["hash_size"]
+        if not 4 <= hash_size <= 20:
+            raise CommandError("--hash-size must be between 4 and 20.")
+
+        with self.open(options["source"]) as lines:
+            if options["passwords"]:
+                passwords = {line.rstrip("\r\n") for line in lines} - {""}
+                hashes = sorted(hash_password(password) for password in passwords)
+            else:
+                hashes = self.read_hashes(
+                    lines, options["min_count"], options["skip_invalid"]
+                )
+
+            try:
+                count = write_file(options["output"], hashes, hash_size)
+            except ValueError as e:
+                raise CommandError(e) from None
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{count} hashes written to {options['output']}.")
+        )
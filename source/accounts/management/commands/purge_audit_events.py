@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import AuditEvent
+
+
+class Command(BaseCommand):
+    help = "Deletes the audit events older than the retention period in time ranges."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.AUDIT_RETENTION_DAYS,
+            help="Retention period in days.",
+        )
+        parser.add_argument(
+            "--batch-minutes",
+            type=int,
+            default=60,
+            help="Length of the time range deleted by each statement.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        step = timedelta(minutes=options["batch_minutes"])
+
+        # The primary key follows the time, the oldest event is read from its index
+        start = (
+            AuditEvent.objects.order_by("pk")
+            .values_list("created_at", flat=True)
+            .first()
+        )
+
+        # Each range is a single DELETE served by the created_at index, short ranges
+        # keep the locks and the transaction log small
+        deleted = 0
+        while start is not None and start < cutoff:
+            start = min(start + step, cutoff)
+            deleted += AuditEvent.objects.filter(created_at__lt=start).delete()[0]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} audit events before {cutoff}.")
+        )
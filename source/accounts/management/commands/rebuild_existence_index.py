@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.existence import existence_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the existence index of emails and usernames from auth_user."
+
+    def handle(self, *args, **options):
+        if not existence_index.is_shared():
+            raise CommandError(
+                "The existence index needs USE_EXISTENCE_INDEX and "
+                "EXISTENCE_INDEX_PATH."
+            )
+
+        existence_index.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"The existence index is built ({settings.EXISTENCE_INDEX_PATH})."
+            )
+        )
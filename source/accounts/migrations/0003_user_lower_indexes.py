@@ -0,0 +1,38 @@
+from django.db import migrations
+
+INDEXES = {
+    "accounts_user_username_lower": "username",
+    "accounts_user_email_lower": "email",
+}
+
+
+def create_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in ("postgresql", "sqlite"):
+        return
+
+    # The pattern ops let PostgreSQL serve LIKE 'prefix%' from the index
+    ops = " varchar_pattern_ops" if vendor == "postgresql" else ""
+    for name, column in INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON auth_user (LOWER({column}){ops})"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in ("postgresql", "sqlite"):
+        return
+
+    for name in INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0002_sessiongeneration"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+INDEX = "accounts_user_email_unique_lower"
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor not in ("postgresql", "sqlite"):
+        return
+
+    # Fails when emails differing only in case are already stored, merge them first.
+    # The users created without an email are left out
+    schema_editor.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {INDEX} ON auth_user (LOWER(email)) "
+        "WHERE email <> ''"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor not in ("postgresql", "sqlite"):
+        return
+
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0004_auditevent"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
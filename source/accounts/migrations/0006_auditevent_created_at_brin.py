@@ -0,0 +1,59 @@
+from django.db import migrations, models
+
+INDEX = "accounts_auditevent_created_at"
+
+
+def create_index(apps, schema_editor):
+    AuditEvent = apps.get_model("accounts", "AuditEvent")
+
+    # The events are appended in time order, so a BRIN index of the block ranges
+    # serves the range filters and purges with a tiny fraction of a btree's size and
+    # insert cost. It can't order the rows, the admin lists them by primary key
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {INDEX} ON {AuditEvent._meta.db_table} "
+            "USING brin (created_at)"
+        )
+    else:
+        schema_editor.add_index(
+            AuditEvent, models.Index(fields=["created_at"], name=INDEX)
+        )
+
+
+def drop_index(apps, schema_editor):
+    AuditEvent = apps.get_model("accounts", "AuditEvent")
+    schema_editor.remove_index(
+        AuditEvent, models.Index(fields=["created_at"], name=INDEX)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0005_user_email_unique_lower"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="auditevent",
+            name="created_at",
+            field=models.DateTimeField(),
+        ),
+        migrations.RunPython(create_index, drop_index),
+        migrations.AlterField(
+            model_name="auditevent",
+            name="event",
+            field=models.CharField(
+                choices=[
+                    ("log_in", "Log in"),
+                    ("log_in_failed", "Failed log in"),
+                    ("sign_up", "Sign up"),
+                    ("activation", "Activation"),
+                    ("password_reset_request", "Password reset request"),
+                    ("password_reset", "Password reset"),
+                    ("email_change_request", "Email change request"),
+                    ("email_change", "Email change"),
+                ],
+                max_length=32,
+            ),
+        ),
+    ]
@@ -1,5 +1,109 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import connections, models, transaction
+from django.dispatch import Signal
+from django.utils.crypto import get_random_string
+from django.utils.translation import gettext_lazy as _
+
+# Sent when users are changed by queryset updates, which don't send post_save
+users_updated = Signal()
+
+# The case-insensitive unique index on the emails, see the 0005 migration. On the
+# other databases the forms check the emails with a query
+EMAIL_UNIQUE_INDEX = "accounts_user_email_unique_lower"
+
+
+def has_unique_email_index(using="default"):
+    return connections[using].vendor in ("postgresql", "sqlite")
+
+
+# The unique constraints of the User fields. PostgreSQL names the constraint of a
+# unique column "<table>_<column>_key"
+DUPLICATE_FIELDS = {
+    EMAIL_UNIQUE_INDEX: "email",
+    "auth_user_username_key": "username",
+}
+
+
+def get_duplicate_field(error):
+    """Returns the User field an IntegrityError is a unique violation of, or None."""
+    # psycopg reports the name of the violated constraint
+    diag = getattr(error.__cause__, "diag", None)
+    constraint = getattr(diag, "constraint_name", None)
+    if constraint is not None:
+        return DUPLICATE_FIELDS.get(constraint)
+
+    # SQLite only gives a message, naming the index or the columns of a constraint
+    message = str(error)
+    if message == f"UNIQUE constraint failed: index '{EMAIL_UNIQUE_INDEX}'":
+        return "email"
+    if message == "UNIQUE constraint failed: auth_user.username":
+        return "username"
+
+    return None
+
+
+class ActivationManager(models.Manager):
+    def issue(self, user, email=""):
+        return self.create(code=get_random_string(20), user=user, email=email)
+
+    def consume(self, code):
+        """
+        Deletes the activation atomically and returns its (user_id, email), or None
+        if the code was already used, so a double-clicked link is applied once.
+        """
+        connection = connections[self.db]
+
+        if connection.features.can_return_columns_from_insert and (
+            connection.vendor != "oracle"
+        ):
+            table = connection.ops.quote_name(self.model._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE code = %s RETURNING user_id, email",
+                    [code],
+                )
+                return cursor.fetchone()
+
+        with transaction.atomic(using=self.db):
+            act = (
+                self.select_for_update()
+                .filter(code=code)
+                .values_list("pk", "user_id", "email")
+                .first()
+            )
+            if not act:
+                return None
+
+            self.filter(pk=act[0]).delete()
+
+        return act[1:]
+
+    def activate(self, code):
+        act = self.consume(code)
+        if not act:
+            return None
+
+        # Activate profile
+        user_id, _email = act
+        User.objects.filter(pk=user_id).update(is_active=True)
+        users_updated.send(sender=User, user_ids=[user_id])
+
+        return user_id
+
+    def change_email(self, code):
+        # A taken email raises IntegrityError and keeps the activation
+        with transaction.atomic(using=self.db):
+            act = self.consume(code)
+            if not act:
+                return None
+
+            # Change the email
+            user_id, email = act
+            User.objects.filter(pk=user_id).update(email=email)
+
+        users_updated.send(sender=User, user_ids=[user_id], emails=[email])
+
+        return user_id
 
 
 class Activation(models.Model):
@@ -7,3 +111,53 @@ class Activation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     code = models.CharField(max_length=20, unique=True)
     email = models.EmailField(blank=True)
+
+    objects = ActivationManager()
+
+
+class SessionGenerationManager(models.Manager):
+    def bump(self, user):
+        updated = self.filter(user=user).update(generation=models.F("generation") + 1)
+        if not updated:
+            self.get_or_create(user=user, defaults={"generation": 1})
+
+
+class SessionGeneration(models.Model):
+    """
+    A per-user counter stored in the stateless sessions, bumping it revokes every
+    session of the user.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    generation = models.PositiveIntegerField(default=0)
+
+    objects = SessionGenerationManager()
+
+
+class AuditEvent(models.Model):
+    """
+    An authentication event. The table has no foreign keys and only grows at the
+    end, so on PostgreSQL created_at has a BRIN index of a few pages (a btree
+    elsewhere, see the 0006 migration) and the expired events are purged in time
+    ranges, see `manage.py purge_audit_events`.
+    """
+
+    class Event(models.TextChoices):
+        LOG_IN = "log_in", _("Log in")
+        LOG_IN_FAILED = "log_in_failed", _("Failed log in")
+        SIGN_UP = "sign_up", _("Sign up")
+        ACTIVATION = "activation", _("Activation")
+        PASSWORD_RESET_REQUEST = "password_reset_request", _("Password reset request")
+        PASSWORD_RESET = "password_reset", _("Password reset")
+        EMAIL_CHANGE_REQUEST = "email_change_request", _("Email change request")
+        EMAIL_CHANGE = "email_change", _("Email change")
+
+    created_at = models.DateTimeField()
+    event = models.CharField(max_length=32, choices=Event)
+    user_id = models.BigIntegerField(null=True, blank=True)
+    ip = models.GenericIPAddressField(null=True, blank=True)
+    details = models.CharField(max_length=254, blank=True)
@@ -0,0 +1,81 @@
+import hashlib
+import math
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.crypto import get_random_string
+
+from .ratelimit import count_hit, get_client_ip, get_hits
+
+CHALLENGE_FIELD = "pow_challenge"
+SOLUTION_FIELD = "pow_solution"
+
+
+def get_difficulty(hits):
+    """
+    The number of leading zero bits the solution hash must have. Nothing is required
+    below POW_RATE_THRESHOLD requests a minute, every doubling of the rate above it
+    makes the challenge four times harder.
+    """
+    threshold = settings.POW_RATE_THRESHOLD
+    if hits <= threshold:
+        return 0
+
+    difficulty = settings.POW_MIN_DIFFICULTY + 2 * int(math.log2(hits / threshold))
+    return min(difficulty, settings.POW_MAX_DIFFICULTY)
+
+
+def get_signer(request, scope):
+    # A challenge is only valid for the form and the client it was issued to
+    return signing.TimestampSigner(
+        salt=f"accounts.pow:{scope}:{get_client_ip(request)}"
+    )
+
+
+def make_challenge(request, scope):
+    """Returns the signed challenge and its difficulty, or None when it isn't needed."""
+    difficulty = get_difficulty(get_hits(f"pow:{scope}"))
+    if not difficulty:
+        return None
+
+    value = f"{difficulty}:{get_random_string(16)}"
+    return get_signer(request, scope).sign(value), difficulty
+
+
+def is_solved(challenge, solution, difficulty):
+    digest = hashlib.sha256(f"{challenge}:{solution}".encode()).digest()
+    return int.from_bytes(digest, "big") >> (256 - difficulty) == 0
+
+
+def check_proof_of_work(request, scope, data=None):
+    """
+    Counts the submission and verifies the solution in `data` (request.POST by
+    default) when the current rate requires one. The challenges aren't stored, only
+    a spent marker is added to the shared cache so that a solution can't be
+    replayed.
+    """
+    required = get_difficulty(count_hit(f"pow:{scope}"))
+    if not required:
+        return True
+
+    data = request.POST if data is None else data
+    challenge = str(data.get(CHALLENGE_FIELD, ""))
+    solution = str(data.get(SOLUTION_FIELD, ""))[:32]
+
+    try:
+        value = get_signer(request, scope).unsign(
+            challenge, max_age=settings.POW_CHALLENGE_AGE
+        )
+    except signing.BadSignature:
+        return False
+
+    # The rate may have doubled once while the form was filled in
+    difficulty = int(value.split(":", 1)[0])
+    if difficulty + 2 < required or not is_solved(challenge, solution, difficulty):
+        return False
+
+    nonce = value.rsplit(":", 1)[1]
+    return cache.add(
+        f"accounts:pow:spent:{nonce}", True, timeout=settings.POW_CHALLENGE_AGE
+    )
@@ -0,0 +1,33 @@
+import time
+
+from django.core.cache import cache
+
+
+def get_window_key(key, period):
+    window = int(time.time() // period)
+    return f"accounts:ratelimit:{key}:{window}"
+
+
+def count_hit(key, period=60):
+    """Counts a hit in a fixed window of `period` seconds shared through the cache."""
+    cache_key = get_window_key(key, period)
+
+    cache.add(cache_key, 0, timeout=period)
+    try:
+        return cache.incr(cache_key)
+    except ValueError:
+        # The window has expired between the calls
+        cache.set(cache_key, 1, timeout=period)
+        return 1
+
+
+def get_hits(key, period=60):
+    return cache.get(get_window_key(key, period), 0)
+
+
+def is_rate_limited(key, limit, period=60):
+    return count_hit(key, period) > limit
+
+
+def get_client_ip(request):
+    return request.META.get("REMOTE_ADDR", "")
@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends import signed_cookies
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+
+from .backends import get_session_generation
+
+GENERATION_SESSION_KEY = "_auth_user_generation"
+
+# Short aliases of the keys stored in every authenticated session
+KEY_ALIASES = {
+    SESSION_KEY: "u",
+    HASH_SESSION_KEY: "h",
+    BACKEND_SESSION_KEY: "b",
+    GENERATION_SESSION_KEY: "g",
+    "_session_expiry": "e",
+}
+ALIAS_KEYS = {alias: key for key, alias in KEY_ALIASES.items()}
+
+SALT = "accounts.sessions"
+
+
+def get_fernet():
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError as exc:
+        raise ImproperlyConfigured(
+            "The cryptography package is required for SESSION_COOKIE_ENCRYPTION_KEY."
+        ) from exc
+
+    return Fernet(settings.SESSION_COOKIE_ENCRYPTION_KEY)
+
+
+class SessionStore(signed_cookies.SessionStore):
+    """
+    A stateless session kept in a compact signed (and optionally encrypted) cookie.
+
+    Authenticated sessions carry the generation of the user, bumping it on the
+    server revokes every cookie issued before. Logging out only drops the cookie of
+    that browser, a copy of it stays valid until it expires unless the user logs
+    out on every device. A password change signs out the other devices through the
+    session hash.
+    """
+
+    def load(self):
+        try:
+            data = self.decode(self.session_key)
+        except Exception:
+            self.create()
+            return {}
+
+        session = {ALIAS_KEYS.get(key, key): value for key, value in data.items()}
+
+        user_id = session.get(SESSION_KEY)
+        if user_id is None:
+            return session
+
+        session.setdefault(BACKEND_SESSION_KEY, settings.AUTHENTICATION_BACKENDS[0])
+
+        generation = get_session_generation(user_id)
+        if generation is None or session.get(GENERATION_SESSION_KEY) != generation:
+            self.create()
+            return {}
+
+        return session
+
+    def _get_session_key(self):
+        data = dict(self._session)
+
+        # The default backend is restored on load, no need to send it back and forth
+        if data.get(BACKEND_SESSION_KEY) == settings.AUTHENTICATION_BACKENDS[0]:
+            del data[BACKEND_SESSION_KEY]
+
+        return self.encode({KEY_ALIASES.get(key, key): v for key, v in data.items()})
+
+    def encode(self, session_dict):
+        if settings.SESSION_COOKIE_ENCRYPTION_KEY:
+            return (
+                get_fernet()
+                .encrypt(signing.JSONSerializer().dumps(session_dict))
+                .decode()
+            )
+
+        return signing.dumps(
+            session_dict, compress=True, salt=SALT, serializer=signing.JSONSerializer
+        )
+
+    def decode(self, session_data):
+        if settings.SESSION_COOKIE_ENCRYPTION_KEY:
+            data = get_fernet().decrypt(session_data, ttl=self.get_session_cookie_age())
+            return signing.JSONSerializer().loads(data)
+
+        return signing.loads(
+            session_data,
+            salt=SALT,
+            serializer=signing.JSONSerializer,
+            max_age=self.get_session_cookie_age(),
+        )
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import get_session_generation, user_cache
+from .existence import existence_index
+from .last_login import update_last_login
+from .models import User, users_updated
+from .sessions import GENERATION_SESSION_KEY
+
+
+def uses_stateless_sessions():
+    return settings.SESSION_ENGINE == "accounts.sessions"
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Covers the password changes as well, so the session hash is checked against
+    # the current password
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, **kwargs):
+    existence_index.add(instance.username, instance.email)
+
+
+@receiver(users_updated, sender=User)
+def refresh_updated_users(sender, user_ids, emails=(), usernames=(), **kwargs):
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+
+    for email in emails:
+        existence_index.add(email=email)
+
+    for username in usernames:
+        existence_index.add(username=username)
+
+
+# Replaces the receiver of django.contrib.auth, which writes on every log-in
+user_logged_in.disconnect(dispatch_uid="update_last_login")
+user_logged_in.connect(update_last_login, dispatch_uid="update_last_login")
+
+
+@receiver(user_logged_in)
+def store_session_generation(sender, request, user, **kwargs):
+    # The API log-ins send the signal without a session, see ApiView.log_in()
+    if uses_stateless_sessions() and SESSION_KEY in request.session:
+        request.session[GENERATION_SESSION_KEY] = get_session_generation(user.pk)
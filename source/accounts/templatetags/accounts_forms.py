@@ -0,0 +1,105 @@
+import copy
+import re
+import threading
+from collections import OrderedDict
+
+from bootstrap4.forms import render_form
+from django import template
+from django.conf import settings
+from django.forms.widgets import CheckboxInput, Input
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+register = template.Library()
+
+cache: OrderedDict = OrderedDict()
+lock = threading.Lock()
+
+PLACEHOLDER_RE = re.compile(r"accountsformvalue(\d+)x")
+
+
+def get_value_shape(form, name, field):
+    """
+    Describes how the initial value affects the markup: text inputs are rendered
+    with a placeholder and filled in later, other widgets key the cache by value.
+    """
+    value = form.get_initial_for_field(field, name)
+
+    if isinstance(field.widget, CheckboxInput):
+        return "checked" if field.widget.check_test(value) else "unchecked"
+
+    if value is None or value == "":
+        return "empty"
+
+    if isinstance(field.widget, Input):
+        return "value"
+
+    return None
+
+
+@register.simple_tag
+def accounts_form(form):
+    """
+    Renders an accounts form exactly as {% bootstrap_form form %} does.
+
+    The markup of unbound forms is built once per form class, language and field
+    layout; only the initial values are escaped and interpolated on each request.
+    Bound forms carry values and errors in their markup and are rendered in full.
+    """
+    if form.is_bound:
+        return render_form(form)
+
+    shapes = tuple(get_value_shape(form, name, f) for name, f in form.fields.items())
+    if None in shapes:
+        return render_form(form)
+
+    key = (type(form), get_language(), form.prefix, form.auto_id, tuple(form.fields))
+    key += shapes
+
+    with lock:
+        parts = cache.get(key)
+        if parts is not None:
+            cache.move_to_end(key)
+
+    if parts is None:
+        # The markup alternates with the field numbers of the placeholders, so the
+        # values are filled in one pass and never searched for placeholders
+        parts = PLACEHOLDER_RE.split(render_template(form, shapes))
+        with lock:
+            cache[key] = parts
+            while len(cache) > settings.FORM_MARKUP_CACHE_SIZE:
+                cache.popitem(last=False)
+
+    values = {}
+    for i, ((name, field), shape) in enumerate(zip(form.fields.items(), shapes)):
+        if shape == "value":
+            value = field.widget.format_value(form.get_initial_for_field(field, name))
+            values[str(i)] = str(conditional_escape(value))
+
+    markup = "".join(
+        part if j % 2 == 0 else values[part] for j, part in enumerate(parts)
+    )
+
+    return mark_safe(markup)
+
+
+def placeholder(i):
+    return f"accountsformvalue{i}x"
+
+
+def render_template(form, shapes):
+    # Render a copy with placeholders instead of the initial values
+    template_form = copy.copy(form)
+    template_form.initial = {
+        name: placeholder(i)
+        for i, (name, shape) in enumerate(zip(form.fields, shapes))
+        if shape == "value"
+    } | {
+        name: form.get_initial_for_field(field, name)
+        for name, field, shape in zip(form.fields, form.fields.values(), shapes)
+        if shape != "value"
+    }
+    template_form._bound_fields_cache = {}
+
+    return str(render_form(template_form))
@@ -0,0 +1,240 @@
+import json
+import re
+
+from django.contrib.auth.signals import user_logged_in
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from accounts.models import Activation, User
+from accounts.tokens import get_token_user, make_token
+
+PASSWORD = "correct-horse-battery-9"
+
+
+@override_settings(
+    DISABLE_USERNAME=False,
+    LOGIN_VIA_EMAIL=True,
+    POW_ENABLED=False,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class ApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("foo", "foo@example.com", PASSWORD)
+
+    def post(self, name, data=None, token=None, body=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        if body is None:
+            body = json.dumps(data or {})
+
+        return self.client.post(
+            reverse(f"accounts:{name}"),
+            body,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    def log_in(self, email="foo@example.com", password=PASSWORD):
+        return self.post("api_log_in", {"email": email, "password": password})
+
+    def test_invalid_json(self):
+        for body in ("{", "[]", '"foo"'):
+            with self.subTest(body=body):
+                response = self.post("api_log_in", body=body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("detail", response.json())
+
+    def test_get(self):
+        response = self.client.get(reverse("accounts:api_log_in"))
+        self.assertEqual(response.status_code, 405)
+
+    def test_log_in(self):
+        received = []
+
+        def receiver(**kwargs):
+            received.append(kwargs)
+
+        user_logged_in.connect(receiver)
+        self.addCleanup(user_logged_in.disconnect, receiver)
+
+        response = self.log_in()
+
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result["user"]["id"], self.user.pk)
+        self.assertEqual(get_token_user(result["token"]), self.user)
+
+        # The signal updates last_login, and the API doesn't start a session
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]["user"], self.user)
+        self.assertIsNotNone(User.objects.get(pk=self.user.pk).last_login)
+        self.assertNotIn("sessionid", response.cookies)
+
+    def test_log_in_errors(self):
+        User.objects.create_user("bar", "bar@example.com", PASSWORD, is_active=False)
+
+        for data in (
+            {"email": "foo@example.com", "password": "wrong"},
+            {"email": "baz@example.com", "password": PASSWORD},
+            {"email": "bar@example.com", "password": PASSWORD},
+            {"email": "foo@example.com"},
+            {},
+        ):
+            with self.subTest(data=data):
+                response = self.post("api_log_in", data)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("errors", response.json())
+
+    def test_log_out(self):
+        token = self.log_in().json()["token"]
+        other = self.log_in().json()["token"]
+
+        response = self.post("api_log_out", token=token)
+        self.assertEqual(response.status_code, 204)
+
+        # Every token of the user is revoked
+        for revoked in (token, other):
+            self.assertIsNone(get_token_user(revoked))
+            self.assertEqual(self.post("api_log_out", token=revoked).status_code, 401)
+
+    def test_bearer_tokens(self):
+        token = make_token(self.user)
+
+        for bad in ("", "foo", token[:-1] + ("A" if token[-1] != "A" else "B")):
+            with self.subTest(token=bad):
+                response = self.post("api_change_email", {}, token=bad)
+                self.assertEqual(response.status_code, 401)
+
+        self.assertEqual(
+            self.post("api_change_email", {}, token=token).status_code, 400
+        )
+
+    @override_settings(API_TOKEN_AGE=-1)
+    def test_expired_token(self):
+        self.assertIsNone(get_token_user(make_token(self.user)))
+
+    def test_token_after_password_change(self):
+        token = make_token(self.user)
+
+        self.user.set_password("another-password-7")
+        self.user.save()
+
+        self.assertIsNone(get_token_user(token))
+
+    def test_token_of_inactive_user(self):
+        token = make_token(self.user)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertIsNone(get_token_user(token))
+
+    def get_sign_up_data(self, **kwargs):
+        return {
+            "username": "bar",
+            "first_name": "",
+            "last_name": "",
+            "email": "bar@example.com",
+            "password1": PASSWORD,
+            "password2": PASSWORD,
+            **kwargs,
+        }
+
+    @override_settings(ENABLE_USER_ACTIVATION=True)
+    def test_sign_up_with_activation(self):
+        response = self.post("api_sign_up", self.get_sign_up_data())
+
+        self.assertEqual(response.status_code, 201)
+        result = response.json()
+        self.assertTrue(result["activation_required"])
+        self.assertNotIn("token", result)
+        self.assertFalse(User.objects.get(pk=result["user"]["id"]).is_active)
+        self.assertEqual(len(mail.outbox), 1)
+
+        code = Activation.objects.get(user_id=result["user"]["id"]).code
+        response = self.post("api_activate", {"code": code})
+        self.assertEqual(response.json(), {"id": result["user"]["id"]})
+        self.assertTrue(User.objects.get(pk=result["user"]["id"]).is_active)
+
+        response = self.post("api_activate", {"code": code})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(ENABLE_USER_ACTIVATION=False)
+    def test_sign_up_without_activation(self):
+        response = self.post("api_sign_up", self.get_sign_up_data())
+
+        self.assertEqual(response.status_code, 201)
+        result = response.json()
+        user = User.objects.get(pk=result["user"]["id"])
+        self.assertEqual(get_token_user(result["token"]), user)
+        self.assertIsNotNone(user.last_login)
+
+    def test_sign_up_errors(self):
+        for data, field in (
+            (self.get_sign_up_data(username="foo"), "username"),
+            (self.get_sign_up_data(email="FOO@example.com"), "email"),
+            (self.get_sign_up_data(email="bar"), "email"),
+            (self.get_sign_up_data(password2="other"), "password2"),
+            (self.get_sign_up_data(password1="foo", password2="foo"), "password2"),
+        ):
+            with self.subTest(data=data):
+                response = self.post("api_sign_up", data)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(field, response.json()["errors"])
+
+        self.assertFalse(User.objects.filter(username="bar").exists())
+
+    def test_restore_password(self):
+        response = self.post("api_restore_password", {"email": "foo@example.com"})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(mail.outbox), 1)
+
+        uid, token = re.search(
+            r"/restore/([^/\s]+)/([^/\s]+)/", mail.outbox[0].body
+        ).groups()
+        data = {
+            "uid": uid,
+            "token": token,
+            "new_password1": "another-password-7",
+            "new_password2": "another-password-7",
+        }
+
+        response = self.post("api_restore_password_confirm", data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            User.objects.get(pk=self.user.pk).check_password("another-password-7")
+        )
+
+        # The token covers the password, so the link works once
+        response = self.post("api_restore_password_confirm", data)
+        self.assertEqual(response.status_code, 400)
+
+    def test_restore_password_errors(self):
+        response = self.post("api_restore_password", {"email": "bar@example.com"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.json()["errors"])
+        self.assertEqual(mail.outbox, [])
+
+        uid = urlsafe_base64_encode(force_bytes(self.user.pk))
+        token = default_token_generator.make_token(self.user)
+        password = {"new_password1": "another-1", "new_password2": "another-1"}
+
+        for data in (
+            {"uid": uid, "token": "foo", **password},
+            {"uid": "foo", "token": token, **password},
+            {"uid": urlsafe_base64_encode(b"0"), "token": token, **password},
+            {"token": token, **password},
+        ):
+            with self.subTest(data=data):
+                response = self.post("api_restore_password_confirm", data)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("detail", response.json())
+
+        data = {"uid": uid, "token": token, "new_password1": "a", "new_password2": "b"}
+        response = self.post("api_restore_password_confirm", data)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("new_password2", response.json()["errors"])
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password(PASSWORD))
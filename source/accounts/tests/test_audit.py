@@ -0,0 +1,173 @@
+import io
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import audit
+from accounts.buffers import FlushBuffer
+from accounts.models import AuditEvent, User
+
+
+class FlushBufferTests(SimpleTestCase):
+    def setUp(self):
+        self.batches = []
+
+        # Only flushed by the tests
+        for target in ("atexit.register", "threading.Thread"):
+            patcher = mock.patch(f"accounts.buffers.{target}")
+            setattr(self, target.split(".")[1], patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def make_buffer(self, max_size=10, batch_size=100):
+        return FlushBuffer(
+            self.batches.append, max_size=max_size, batch_size=batch_size, interval=3600
+        )
+
+    def test_overflow(self):
+        buffer = self.make_buffer(max_size=3)
+
+        with self.assertLogs("accounts.buffers", "WARNING") as logs:
+            added = [buffer.add(i) for i in range(5)]
+
+        self.assertEqual(added, [True, True, True, False, False])
+        self.assertEqual(buffer.dropped, 2)
+        # Logged on the first drop and then every thousand
+        self.assertEqual(len(logs.records), 1)
+
+        buffer.flush()
+        self.assertEqual(self.batches, [[0, 1, 2]])
+
+        # The flush makes room again, the drops stay counted
+        self.assertTrue(buffer.add(5))
+        self.assertEqual(buffer.dropped, 2)
+
+    def test_batches(self):
+        buffer = self.make_buffer(batch_size=2)
+        for i in range(5):
+            buffer.add(i)
+
+        buffer.flush()
+        self.assertEqual(self.batches, [[0, 1], [2, 3], [4]])
+
+        buffer.flush()
+        self.assertEqual(len(self.batches), 3)
+
+    def test_flush_at_exit(self):
+        buffer = self.make_buffer()
+        self.register.assert_not_called()
+
+        buffer.add(1)
+        buffer.add(2)
+        self.register.assert_called_once_with(buffer.flush)
+        self.Thread.assert_called_once_with(target=buffer.run, daemon=True)
+
+        # What the interpreter runs on exit
+        self.register.call_args.args[0]()
+        self.assertEqual(self.batches, [[1, 2]])
+
+    def test_failed_write(self):
+        buffer = FlushBuffer(
+            mock.Mock(side_effect=RuntimeError),
+            max_size=10,
+            batch_size=10,
+            interval=3600,
+        )
+        buffer.add(1)
+
+        with self.assertLogs("accounts.buffers", "ERROR"):
+            buffer.flush()
+        self.assertEqual(len(buffer.items), 0)
+
+
+class FlushBufferThreadTests(SimpleTestCase):
+    @mock.patch("accounts.buffers.atexit.register")
+    def test_full_batch_wakes_the_thread(self, register):
+        flushed = threading.Event()
+        buffer = FlushBuffer(
+            lambda batch: flushed.set(), max_size=10, batch_size=2, interval=3600
+        )
+
+        buffer.add(1)
+        self.assertFalse(flushed.wait(0.1))
+
+        buffer.add(2)
+        self.assertTrue(flushed.wait(5))
+
+
+@override_settings(
+    AUDIT_ENABLED=True,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class AuditTests(TestCase):
+    def setUp(self):
+        User.objects.create_user("foo", "foo@example.com", "password")
+
+        # Flushed by the tests, the thread waits for a full batch or an hour
+        buffer = FlushBuffer(
+            audit.write_events, max_size=10, batch_size=10, interval=3600
+        )
+        patcher = mock.patch.object(audit, "buffer", buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def log_in(self, password):
+        return self.client.post(
+            reverse("accounts:log_in"),
+            {"email": "foo@example.com", "password": password},
+            REMOTE_ADDR="192.0.2.1",
+        )
+
+    @override_settings(LOGIN_VIA_EMAIL=True)
+    def test_record(self):
+        self.log_in("wrong")
+        self.log_in("password")
+        self.assertFalse(AuditEvent.objects.exists())
+
+        audit.buffer.flush()
+        events = list(
+            AuditEvent.objects.order_by("pk").values_list("event", "ip", "details")
+        )
+        self.assertEqual(
+            events,
+            [
+                (AuditEvent.Event.LOG_IN_FAILED, "192.0.2.1", "foo@example.com"),
+                (AuditEvent.Event.LOG_IN, "192.0.2.1", ""),
+            ],
+        )
+
+    @override_settings(AUDIT_ENABLED=False)
+    def test_disabled(self):
+        audit.record(AuditEvent.Event.LOG_IN)
+        self.assertEqual(len(audit.buffer.items), 0)
+
+    def test_purge(self):
+        now = timezone.now()
+        ages = [timedelta(days=100, hours=5), timedelta(days=91)]
+        ages += [timedelta(days=90, minutes=m) for m in range(1, 5)]
+        ages += [timedelta(days=89), timedelta()]
+        AuditEvent.objects.bulk_create(
+            AuditEvent(created_at=now - age, event=AuditEvent.Event.LOG_IN)
+            for age in ages
+        )
+
+        stdout = io.StringIO()
+        call_command("purge_audit_events", days=90, batch_minutes=30, stdout=stdout)
+
+        self.assertIn("Deleted 6 audit events", stdout.getvalue())
+        self.assertEqual(AuditEvent.objects.count(), 2)
+        self.assertFalse(
+            AuditEvent.objects.filter(created_at__lt=now - timedelta(days=90)).exists()
+        )
+
+        call_command("purge_audit_events", days=90, stdout=stdout)
+        self.assertEqual(AuditEvent.objects.count(), 2)
+
+    def test_purge_empty(self):
+        stdout = io.StringIO()
+        call_command("purge_audit_events", stdout=stdout)
+        self.assertIn("Deleted 0 audit events", stdout.getvalue())
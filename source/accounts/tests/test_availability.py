@@ -0,0 +1,72 @@
+import io
+import tempfile
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.existence import existence_index
+from accounts.models import User
+
+
+@override_settings(
+    USE_EXISTENCE_INDEX=True,
+    EXISTENCE_INDEX_CAPACITY=1000,
+    AVAILABILITY_RATE_LIMIT=100,
+)
+class AvailabilityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = str(Path(directory.name) / "existence.bin")
+        self.enterContext(override_settings(EXISTENCE_INDEX_PATH=path))
+        self.addCleanup(existence_index.close)
+
+        User.objects.create_user("foo", "foo@example.com", "x")
+        call_command("rebuild_existence_index", stdout=io.StringIO())
+
+    def check(self, **params):
+        return self.client.get(reverse("accounts:availability"), params).json()
+
+    def test_available(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.check(username="bar", email="bar@example.com"),
+                {"username": True, "email": True},
+            )
+
+        self.assertEqual(
+            self.check(username="FOO", email="Foo@example.com"),
+            {"username": False, "email": False},
+        )
+
+    def test_filter_answers_are_not_cached(self):
+        self.assertEqual(self.check(username="bar"), {"username": True})
+
+        # A user created by another worker, the filter has it once the add is done
+        User.objects.bulk_create([User(username="bar", email="bar@example.com")])
+        existence_index.add("bar", "bar@example.com")
+
+        self.assertEqual(self.check(username="bar"), {"username": False})
+
+    def test_database_answers_are_cached(self):
+        self.assertEqual(self.check(username="foo"), {"username": False})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.check(username="foo"), {"username": False})
+
+    @override_settings(AVAILABILITY_RATE_LIMIT=1)
+    def test_rate_limit(self):
+        self.check(username="bar")
+
+        response = self.client.get(
+            reverse("accounts:availability"),
+            {"username": "bar"},
+            headers={"accept-language": "fr"},
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json(), {"error": "Trop de requêtes."})
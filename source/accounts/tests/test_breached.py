@@ -0,0 +1,213 @@
+import gzip
+import io
+import tempfile
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from accounts.breached import BreachedPasswords, hash_password
+from accounts.validators import BreachedPasswordValidator
+
+
+def get_prefix(password):
+    return hash_password(password)[:2]
+
+
+class BreachedPasswordsTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        # Passwords in the first, last and two neighbouring buckets, and some others
+        cls.edges = {b"\x00\x00": [], b"\xff\xff": [], b"\x7f\xff": [], b"\x80\x00": []}
+        cls.others = []
+        for i in range(400_000):
+            password = f"password{i}"
+            prefix = get_prefix(password)
+            if prefix in cls.edges:
+                cls.edges[prefix].append(password)
+            elif i % 1000 == 0:
+                cls.others.append(password)
+
+        for prefix, passwords in cls.edges.items():
+            assert len(passwords) >= 2, prefix
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def write_source(self, lines, name="source.txt"):
+        path = self.directory / name
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(path, "wt") as f:
+            f.writelines(f"{line}\n" for line in lines)
+
+        return str(path)
+
+    def build(self, lines, *args, name="source.txt"):
+        output = str(self.directory / "breached.bin")
+        call_command(
+            "build_breached_passwords",
+            self.write_source(lines, name),
+            output,
+            *args,
+            stdout=io.StringIO(),
+            stderr=io.StringIO(),
+        )
+
+        return output
+
+    def build_from_passwords(self, passwords, *args, **kwargs):
+        hashes = sorted(hash_password(password).hex().upper() for password in passwords)
+        return self.build([f"{digest}:3" for digest in hashes], *args, **kwargs)
+
+    def get_breached_and_clean(self):
+        breached, clean = [], []
+        for passwords in self.edges.values():
+            breached += passwords[::2]
+            clean += passwords[1::2]
+
+        breached += self.others[::2]
+        clean += self.others[1::2]
+
+        return breached, clean
+
+    def assertLookups(self, passwords, breached, clean):
+        for password in breached:
+            self.assertIn(password, passwords)
+        for password in clean:
+            self.assertNotIn(password, passwords)
+
+    def test_lookup(self):
+        breached, clean = self.get_breached_and_clean()
+
+        for hash_size in ("4", "10", "20"):
+            with self.subTest(hash_size=hash_size):
+                passwords = BreachedPasswords(
+                    self.build_from_passwords(breached, "--hash-size", hash_size)
+                )
+                self.assertEqual(passwords.count, len(breached))
+                self.assertLookups(passwords, breached, clean)
+
+    def test_first_and_last_hash(self):
+        first = self.edges[b"\x00\x00"][0]
+        last = self.edges[b"\xff\xff"][0]
+
+        passwords = BreachedPasswords(self.build_from_passwords([first, last]))
+        self.assertLookups(passwords, [first, last], self.others)
+
+        passwords = BreachedPasswords(self.build_from_passwords([first]))
+        self.assertLookups(passwords, [first], [last])
+
+        passwords = BreachedPasswords(self.build_from_passwords([last]))
+        self.assertLookups(passwords, [last], [first])
+
+    def test_empty(self):
+        passwords = BreachedPasswords(self.build([]))
+        self.assertEqual(passwords.count, 0)
+        self.assertLookups(passwords, [], [self.edges[b"\x00\x00"][0], *self.others])
+
+    def test_gzip_and_plain_passwords(self):
+        breached, clean = self.get_breached_and_clean()
+
+        passwords = BreachedPasswords(
+            self.build_from_passwords(breached, name="source.txt.gz")
+        )
+        self.assertLookups(passwords, breached, clean)
+
+        passwords = BreachedPasswords(self.build(breached, "--passwords"))
+        self.assertLookups(passwords, breached, clean)
+
+    def test_min_count(self):
+        common, rare = self.others[:5], self.others[5:10]
+        hashes = sorted(
+            [(hash_password(p).hex(), 10) for p in common]
+            + [(hash_password(p).hex(), 1) for p in rare]
+        )
+
+        passwords = BreachedPasswords(
+            self.build([f"{h}:{c}" for h, c in hashes], "--min-count", "5")
+        )
+        self.assertLookups(passwords, common, rare)
+
+    def test_invalid_lines(self):
+        digest = hash_password(self.others[0]).hex()
+        for line in (
+            "not a hash",
+            digest[:-1],
+            digest[:-1] + "g",
+            hash_password("x").hex() * 2,
+            f"{digest}:many",
+        ):
+            with self.subTest(line=line):
+                with self.assertRaisesMessage(CommandError, "isn't a SHA-1 hash"):
+                    self.build([line])
+
+        passwords = BreachedPasswords(
+            self.build(["not a hash", digest], "--skip-invalid")
+        )
+        self.assertLookups(passwords, [self.others[0]], self.others[1:])
+
+    def test_unsorted(self):
+        hashes = sorted(hash_password(p).hex() for p in self.others[:2])
+        with self.assertRaisesMessage(CommandError, "aren't sorted"):
+            self.build(hashes[::-1])
+
+    def test_hash_size(self):
+        for hash_size in ("3", "21"):
+            with self.assertRaises(CommandError):
+                self.build([], "--hash-size", hash_size)
+
+
+class BreachedPasswordValidatorTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "breached.bin"
+
+    def build(self):
+        source = self.path.parent / "source.txt"
+        source.write_text(hash_password("hunter2").hex() + "\n")
+        call_command(
+            "build_breached_passwords",
+            str(source),
+            str(self.path),
+            stdout=io.StringIO(),
+        )
+
+    def test_validate(self):
+        self.build()
+
+        validator = BreachedPasswordValidator(str(self.path))
+        with self.assertRaises(ValidationError) as e:
+            validator.validate("hunter2")
+        self.assertEqual(e.exception.code, "password_breached")
+        validator.validate("hunter3")
+
+    def assertDisabled(self):
+        with self.assertLogs("accounts.validators", "ERROR"):
+            validator = BreachedPasswordValidator(str(self.path))
+
+        self.assertIsNone(validator.passwords)
+        validator.validate("hunter2")
+
+    def test_missing_file(self):
+        self.assertDisabled()
+
+    def test_corrupt_files(self):
+        self.build()
+        content = self.path.read_bytes()
+
+        for name, data in (
+            ("empty", b""),
+            ("other", b"x" * len(content)),
+            ("truncated", content[:-1]),
+            ("header only", content[:16]),
+        ):
+            with self.subTest(name):
+                self.path.write_bytes(data)
+                self.assertDisabled()
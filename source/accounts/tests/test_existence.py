@@ -0,0 +1,123 @@
+import io
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from accounts.checks import check_existence_index
+from accounts.existence import ExistenceIndex, existence_index
+from accounts.models import User
+
+
+@override_settings(USE_EXISTENCE_INDEX=True, EXISTENCE_INDEX_CAPACITY=1000)
+class ExistenceIndexTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / "existence.bin")
+        self.enterContext(override_settings(EXISTENCE_INDEX_PATH=self.path))
+
+        self.addCleanup(existence_index.close)
+        existence_index.close()
+
+        User.objects.create_user("foo", "foo@example.com", "x")
+
+    def rebuild(self):
+        call_command("rebuild_existence_index", stdout=io.StringIO())
+
+    @override_settings(EXISTENCE_INDEX_PATH=None)
+    def test_without_path(self):
+        with self.assertNumQueries(0):
+            self.assertTrue(existence_index.might_contain_username("bar"))
+            self.assertFalse(existence_index.is_new_email("bar@example.com"))
+
+        with self.assertRaises(CommandError):
+            self.rebuild()
+
+    def test_not_built(self):
+        # The workers never stream the users, the only query is the insert. Every
+        # identifier may be taken
+        with self.assertNumQueries(1):
+            self.assertFalse(existence_index.is_new_username("bar"))
+            User.objects.create_user("bar", "bar@example.com", "x")
+
+        self.assertFalse(Path(self.path).exists())
+        self.assertEqual([e.id for e in check_existence_index(None)], ["accounts.W001"])
+
+        self.rebuild()
+        self.assertEqual(check_existence_index(None), [])
+
+    def test_lookups(self):
+        self.rebuild()
+
+        with self.assertNumQueries(0):
+            self.assertFalse(existence_index.is_new_username("FOO"))
+            self.assertFalse(existence_index.is_new_email("Foo@Example.com"))
+            self.assertTrue(existence_index.is_new_username("bar"))
+            self.assertTrue(existence_index.is_new_email("bar@example.com"))
+
+        User.objects.create_user("bar", "bar@example.com", "x")
+        self.assertFalse(existence_index.is_new_username("bar"))
+        self.assertFalse(existence_index.is_new_email("BAR@example.com"))
+
+    def test_shared_between_processes(self):
+        self.rebuild()
+
+        # Another worker maps the same file and sees the adds of this one
+        other = ExistenceIndex()
+        self.addCleanup(other.close)
+        self.assertTrue(other.is_new_username("bar"))
+
+        User.objects.create_user("bar", "bar@example.com", "x")
+        self.assertFalse(other.is_new_username("bar"))
+
+    def test_rebuild_replaces_the_map(self):
+        self.rebuild()
+        existence_index.is_new_username("foo")
+        old_buffer = existence_index.filter.buffer
+
+        # Rebuilt by another process
+        ExistenceIndex().rebuild()
+        self.assertTrue(existence_index.is_replaced())
+
+        self.assertFalse(existence_index.is_new_username("foo"))
+        self.assertTrue(old_buffer.closed)
+        self.assertIsNot(existence_index.filter.buffer, old_buffer)
+
+    def test_add_during_rebuild(self):
+        self.rebuild()
+
+        filling = threading.Event()
+        resume = threading.Event()
+
+        def slow_fill(bloom):
+            # Streams the users as they were before "bar" was added, the thread
+            # can't see the data of the test transaction
+            bloom.add("username:foo")
+            filling.set()
+            resume.wait(5)
+
+        with mock.patch.object(ExistenceIndex, "fill", side_effect=slow_fill):
+            rebuild = threading.Thread(target=existence_index.rebuild)
+            rebuild.start()
+            self.assertTrue(filling.wait(5))
+
+            add = threading.Thread(
+                target=existence_index.add, args=["bar", "bar@example.com"]
+            )
+            add.start()
+
+            # The add waits for the new file instead of going to the old one
+            add.join(0.1)
+            self.assertTrue(add.is_alive())
+
+            resume.set()
+            rebuild.join()
+            add.join()
+
+        self.assertFalse(existence_index.is_new_username("bar"))
+        self.assertFalse(existence_index.is_new_username("foo"))
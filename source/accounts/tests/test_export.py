@@ -0,0 +1,68 @@
+import io
+import json
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from accounts.models import User
+
+JOINED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class ExportUsersTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.state_file = str(Path(directory.name) / "state.json")
+
+    def create_users(self, *usernames):
+        User.objects.bulk_create(
+            [
+                User(
+                    username=username,
+                    email=f"{username}@example.com",
+                    date_joined=JOINED,
+                )
+                for username in usernames
+            ]
+        )
+
+    def export(self, *args):
+        stdout = io.StringIO()
+        call_command(
+            "export_users",
+            "--format=jsonl",
+            f"--state-file={self.state_file}",
+            *args,
+            stdout=stdout,
+            stderr=io.StringIO(),
+        )
+        return [json.loads(line)["username"] for line in stdout.getvalue().splitlines()]
+
+    def test_watermark_resumes_within_a_timestamp(self):
+        self.create_users("foo", "bar")
+        self.assertEqual(self.export(), ["foo", "bar"])
+
+        # Joined in the same instant as the last exported user
+        self.create_users("baz")
+        self.assertEqual(self.export(), ["baz"])
+        self.assertEqual(self.export(), [])
+
+        state = json.loads(Path(self.state_file).read_text())
+        self.assertEqual(state["pk"], User.objects.get(username="baz").pk)
+
+    def test_since(self):
+        self.create_users("foo")
+        self.assertEqual(self.export(f"--since={JOINED.isoformat()}"), [])
+
+    def test_csv(self):
+        self.create_users("foo")
+        stdout = io.StringIO()
+        call_command("export_users", stdout=stdout, stderr=io.StringIO())
+
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["id", "username", "email"])
+        self.assertEqual(lines[1].split(",")[1], "foo")
@@ -0,0 +1,96 @@
+from bootstrap4.forms import render_form
+from django.conf import settings
+from django.contrib.auth.forms import PasswordChangeForm, SetPasswordForm
+from django.test import SimpleTestCase
+from django.utils import translation
+
+from accounts import forms
+from accounts.forms import ChangeProfileForm
+from accounts.models import User
+from accounts.templatetags.accounts_forms import accounts_form, placeholder
+
+
+class AccountsFormTests(SimpleTestCase):
+    def assertRendersLikeBootstrap(self, form):
+        self.assertEqual(str(accounts_form(form)), str(render_form(form)))
+
+    def test_initial_values(self):
+        form = ChangeProfileForm(initial={"first_name": "Foo", "last_name": "<Bar>"})
+        self.assertRendersLikeBootstrap(form)
+
+    def test_value_containing_a_placeholder(self):
+        # Rendered twice so the second one uses the cached markup
+        for _ in range(2):
+            form = ChangeProfileForm(
+                initial={"first_name": placeholder(1), "last_name": "Smith"}
+            )
+            self.assertRendersLikeBootstrap(form)
+
+    def test_every_form_in_every_language(self):
+        user = User(username="foo", email="foo@example.com")
+
+        # The forms of the templates using {% accounts_form %}, with the initial
+        # values they can be shown with
+        cases = [
+            ("log in", forms.SignInViaUsernameForm, {"username": "foo"}),
+            ("log in", forms.SignInViaEmailForm, {"email": "foo@example.com"}),
+            (
+                "log in",
+                forms.SignInViaEmailOrUsernameForm,
+                {"email_or_username": "foo", "remember_me": True},
+            ),
+            ("log in via link", forms.LogInViaLinkForm, {"email": "foo@example.com"}),
+            (
+                "sign up",
+                forms.SignUpForm,
+                {"username": "foo", "email": "foo@example.com", "first_name": "<F>"},
+            ),
+            ("remind username", forms.RemindUsernameForm, {"email": "a@b.c"}),
+            (
+                "resend activation code",
+                forms.ResendActivationCodeForm,
+                {"email_or_username": "foo"},
+            ),
+            (
+                "resend activation code",
+                forms.ResendActivationCodeViaEmailForm,
+                {"email": "a@b.c"},
+            ),
+            ("restore password", forms.RestorePasswordForm, {"email": "a@b.c"}),
+            (
+                "restore password",
+                forms.RestorePasswordViaEmailOrUsernameForm,
+                {"email_or_username": "foo"},
+            ),
+            (
+                "restore password confirm",
+                lambda **kwargs: SetPasswordForm(user, **kwargs),
+                {},
+            ),
+            (
+                "change password",
+                lambda **kwargs: PasswordChangeForm(user, **kwargs),
+                {},
+            ),
+            (
+                "change profile",
+                ChangeProfileForm,
+                {"first_name": "Foo", "last_name": "O'Bar & <Baz>"},
+            ),
+            (
+                "change email",
+                lambda **kwargs: forms.ChangeEmailForm(user, **kwargs),
+                {"email": user.email},
+            ),
+        ]
+
+        for language, _name in settings.LANGUAGES:
+            for name, form_class, initial in cases:
+                for values in [{}, initial]:
+                    with (
+                        self.subTest(language=language, form=name, initial=values),
+                        translation.override(language),
+                    ):
+                        # The second one is filled in from the cached markup
+                        for _ in range(2):
+                            self.assertRendersLikeBootstrap(form_class(initial=values))
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts import last_login
+from accounts.backends import CachedModelBackend
+from accounts.buffers import FlushBuffer
+from accounts.models import User
+
+
+@mock.patch("accounts.last_login.is_cache_shared", return_value=True)
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class LastLoginTests(TestCase):
+    def setUp(self):
+        # The token markers of the other tests would force writes
+        cache.clear()
+
+        self.users = [
+            User.objects.create_user(f"foo{i}", f"foo{i}@example.com", "x")
+            for i in range(10)
+        ]
+
+    def count_writes(self, logins=1000):
+        with CaptureQueriesContext(connection) as queries:
+            for i in range(logins):
+                # Every log-in loads the user again, like the authentication does
+                user = User.objects.get(pk=self.users[i % len(self.users)].pk)
+                last_login.update_last_login(User, user)
+            last_login.buffer.flush()
+
+        return sum(q["sql"].startswith("UPDATE") for q in queries)
+
+    @override_settings(LAST_LOGIN_UPDATE_INTERVAL=0, LAST_LOGIN_BUFFERED=False)
+    def test_every_log_in(self, is_cache_shared):
+        self.assertEqual(self.count_writes(), 1000)
+
+    @override_settings(LAST_LOGIN_UPDATE_INTERVAL=3600, LAST_LOGIN_BUFFERED=False)
+    def test_throttled(self, is_cache_shared):
+        self.assertLessEqual(self.count_writes(), len(self.users))
+
+    @override_settings(LAST_LOGIN_UPDATE_INTERVAL=0, LAST_LOGIN_BUFFERED=True)
+    def test_buffered(self, is_cache_shared):
+        # Flushed only by count_writes(), not by the background thread
+        buffer = FlushBuffer(
+            last_login.write_last_logins,
+            max_size=10000,
+            batch_size=10000,
+            interval=3600,
+        )
+        with mock.patch.object(last_login, "buffer", buffer):
+            self.assertLessEqual(self.count_writes(), 1)
+
+        last_logins = User.objects.values_list("last_login", flat=True)
+        self.assertNotIn(None, last_logins)
+
+    @override_settings(LAST_LOGIN_UPDATE_INTERVAL=3600, LAST_LOGIN_BUFFERED=True)
+    def test_outstanding_token_is_invalidated(self, is_cache_shared):
+        # Logged in recently, so the next log-in is throttled without a token
+        user = self.users[0]
+        user.last_login = timezone.now() - timedelta(minutes=30)
+        user.save(update_fields=["last_login"])
+
+        token = default_token_generator.make_token(user)
+        last_login.track_token(user)
+
+        self.assertEqual(self.count_writes(logins=1), 1)
+        user.refresh_from_db()
+        self.assertFalse(default_token_generator.check_token(user, token))
+
+        # Only the first log-in after the token is written through
+        self.assertEqual(self.count_writes(logins=1), 0)
+
+    @override_settings(LAST_LOGIN_UPDATE_INTERVAL=3600, LAST_LOGIN_BUFFERED=False)
+    def test_without_shared_cache(self, is_cache_shared):
+        is_cache_shared.return_value = False
+
+        self.assertEqual(self.count_writes(logins=20), 20)
+
+    @mock.patch("accounts.backends.is_cache_shared", return_value=True)
+    def test_cached_user_is_refreshed(self, backend_is_cache_shared, is_cache_shared):
+        backend = CachedModelBackend()
+        pk = self.users[0].pk
+
+        for buffered in (False, True):
+            with (
+                self.subTest(buffered=buffered),
+                override_settings(
+                    LAST_LOGIN_UPDATE_INTERVAL=0, LAST_LOGIN_BUFFERED=buffered
+                ),
+            ):
+                cached = backend.get_user(pk)
+
+                last_login.update_last_login(User, User.objects.get(pk=pk))
+                last_login.buffer.flush()
+
+                stored = User.objects.get(pk=pk).last_login
+                self.assertNotEqual(cached.last_login, stored)
+                self.assertEqual(backend.get_user(pk).last_login, stored)
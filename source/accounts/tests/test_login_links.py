@@ -0,0 +1,130 @@
+import re
+from unittest import mock
+
+from django.contrib.auth.tokens import default_token_generator
+from django.contrib.messages import get_messages
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from accounts.backends import CachedModelBackend
+from accounts.models import User
+from accounts.tokens import login_link_token_generator
+
+LINK_RE = re.compile(r"https?://[^/\s]+(/\S*/log-in/link/[^/\s]+/[^/\s]+/)")
+
+
+@override_settings(
+    ENABLE_LOGIN_LINKS=True,
+    LOGIN_VIA_EMAIL=True,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class LoginLinkTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("foo", "foo@example.com", "password")
+
+    def request_link(self, email="foo@example.com", client=None):
+        client = client or self.client
+        return client.post(reverse("accounts:log_in_via_link"), {"email": email})
+
+    def get_link(self):
+        self.request_link()
+        return LINK_RE.search(mail.outbox[-1].body).group(1)
+
+    def assertLoggedIn(self, user=None):
+        session_user = self.client.session.get("_auth_user_id")
+        self.assertEqual(session_user, str(user.pk) if user else None)
+
+    def test_token_generator(self):
+        token = login_link_token_generator.make_token(self.user)
+        self.assertTrue(login_link_token_generator.check_token(self.user, token))
+        self.assertFalse(default_token_generator.check_token(self.user, token))
+
+        restore_token = default_token_generator.make_token(self.user)
+        self.assertFalse(
+            login_link_token_generator.check_token(self.user, restore_token)
+        )
+
+    def test_valid_link(self):
+        link = self.get_link()
+
+        # The mail scanners only open the link
+        response = self.client.get(link)
+        self.assertEqual(response.status_code, 200)
+        self.assertLoggedIn(None)
+
+        response = self.client.post(link)
+        self.assertRedirects(response, reverse("index"), fetch_redirect_response=False)
+        self.assertLoggedIn(self.user)
+
+    def test_used_link(self):
+        link = self.get_link()
+        self.client.post(link)
+        self.client.logout()
+
+        response = self.client.post(link)
+        self.assertRedirects(response, reverse("accounts:log_in_via_link"))
+        self.assertLoggedIn(None)
+
+    def test_link_after_log_in(self):
+        link = self.get_link()
+        self.client.post(
+            reverse("accounts:log_in"),
+            {"email": "foo@example.com", "password": "password"},
+        )
+        self.client.logout()
+
+        self.client.post(link)
+        self.assertLoggedIn(None)
+
+    def test_expired_link(self):
+        link = self.get_link()
+
+        with self.settings(LOGIN_LINK_TIMEOUT=-1):
+            self.client.post(link)
+        self.assertLoggedIn(None)
+
+    def test_inactive_user(self):
+        link = self.get_link()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.client.post(link)
+        self.assertLoggedIn(None)
+
+    def test_unknown_email(self):
+        responses = []
+        for email in ("foo@example.com", "bar@example.com"):
+            response = self.request_link(email, self.client_class())
+            messages = [str(m) for m in get_messages(response.wsgi_request)]
+            responses.append((response.status_code, response.url, messages))
+
+        self.assertEqual(responses[0], responses[1])
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_inactive_email(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.request_link()
+        self.assertEqual(mail.outbox, [])
+
+    @mock.patch("accounts.backends.is_cache_shared", return_value=True)
+    def test_cached_user_is_refreshed(self, is_cache_shared):
+        backend = CachedModelBackend()
+        link = self.get_link()
+        backend.get_user(self.user.pk)
+
+        self.client.post(link)
+
+        self.assertEqual(
+            backend.get_user(self.user.pk).last_login,
+            User.objects.get(pk=self.user.pk).last_login,
+        )
+
+    @override_settings(ENABLE_LOGIN_LINKS=False)
+    def test_disabled(self):
+        self.assertEqual(self.request_link().status_code, 404)
+        uid = urlsafe_base64_encode(force_bytes(self.user.pk))
+        token = login_link_token_generator.make_token(self.user)
+        url = reverse("accounts:log_in_via_link_confirm", args=[uid, token])
+        self.assertEqual(self.client.post(url).status_code, 404)
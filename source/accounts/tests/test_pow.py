@@ -0,0 +1,160 @@
+import itertools
+import json
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from accounts import checks
+from accounts.models import User
+from accounts.pow import (
+    CHALLENGE_FIELD,
+    SOLUTION_FIELD,
+    check_proof_of_work,
+    is_solved,
+    make_challenge,
+)
+from accounts.ratelimit import count_hit
+
+# An easy challenge after flood()
+POW_SETTINGS = {
+    "POW_ENABLED": True,
+    "POW_RATE_THRESHOLD": 1,
+    "POW_MIN_DIFFICULTY": 4,
+    "POW_MAX_DIFFICULTY": 4,
+}
+
+
+def flood(*scopes):
+    for scope in scopes:
+        count_hit(f"pow:{scope}")
+        count_hit(f"pow:{scope}")
+
+
+def solve(challenge, difficulty):
+    for solution in map(str, itertools.count()):
+        if is_solved(challenge, solution, difficulty):
+            return solution
+
+
+@override_settings(**POW_SETTINGS)
+class ProofOfWorkTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        flood("sign_up", "log_in")
+        self.factory = RequestFactory()
+
+    def make_request(self, data=None, ip="10.0.0.1"):
+        return self.factory.post("/", data or {}, REMOTE_ADDR=ip)
+
+    def get_solved_data(self, scope="sign_up", ip="10.0.0.1"):
+        challenge, difficulty = make_challenge(self.make_request(ip=ip), scope)
+        return {
+            CHALLENGE_FIELD: challenge,
+            SOLUTION_FIELD: solve(challenge, difficulty),
+        }
+
+    def test_no_challenge_below_threshold(self):
+        with override_settings(POW_RATE_THRESHOLD=10):
+            self.assertIsNone(make_challenge(self.make_request(), "sign_up"))
+            self.assertTrue(check_proof_of_work(self.make_request(), "sign_up"))
+
+    def test_issue(self):
+        challenge, difficulty = make_challenge(self.make_request(), "sign_up")
+
+        self.assertEqual(difficulty, 4)
+        self.assertTrue(challenge.startswith("4:"))
+
+    def test_verify(self):
+        data = self.get_solved_data()
+        self.assertTrue(check_proof_of_work(self.make_request(data), "sign_up"))
+
+    def test_verify_json_data(self):
+        data = self.get_solved_data()
+        self.assertTrue(check_proof_of_work(self.make_request(), "sign_up", data))
+
+    def test_missing_or_wrong_solution(self):
+        data = self.get_solved_data()
+
+        self.assertFalse(check_proof_of_work(self.make_request(), "sign_up"))
+
+        wrong = (str(i) for i in itertools.count())
+        data[SOLUTION_FIELD] = next(
+            s for s in wrong if not is_solved(data[CHALLENGE_FIELD], s, 4)
+        )
+        self.assertFalse(check_proof_of_work(self.make_request(data), "sign_up"))
+
+    def test_expired(self):
+        data = self.get_solved_data()
+
+        with override_settings(POW_CHALLENGE_AGE=-1):
+            self.assertFalse(check_proof_of_work(self.make_request(data), "sign_up"))
+
+    def test_replay(self):
+        data = self.get_solved_data()
+
+        self.assertTrue(check_proof_of_work(self.make_request(data), "sign_up"))
+        self.assertFalse(check_proof_of_work(self.make_request(data), "sign_up"))
+
+    def test_wrong_scope(self):
+        data = self.get_solved_data(scope="sign_up")
+        self.assertFalse(check_proof_of_work(self.make_request(data), "log_in"))
+
+    def test_wrong_client(self):
+        data = self.get_solved_data(ip="10.0.0.1")
+        request = self.make_request(data, ip="10.0.0.2")
+        self.assertFalse(check_proof_of_work(request, "sign_up"))
+
+    def test_requires_shared_cache(self):
+        self.assertEqual(
+            [e.id for e in checks.check_proof_of_work_cache(None)], ["accounts.E001"]
+        )
+
+        with override_settings(POW_ENABLED=False):
+            self.assertEqual(checks.check_proof_of_work_cache(None), [])
+
+
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    ENABLE_USER_ACTIVATION=False,
+    **POW_SETTINGS,
+)
+class ProofOfWorkViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        flood("SignUpView", "ApiSignUpView")
+
+    def sign_up_data(self):
+        return {
+            "username": "foo",
+            "email": "foo@example.com",
+            "first_name": "Foo",
+            "last_name": "Bar",
+            "password1": "Zx9!aaaaQQ",
+            "password2": "Zx9!aaaaQQ",
+        }
+
+    def test_failed_check_keeps_the_form(self):
+        response = self.client.post(reverse("accounts:sign_up"), self.sign_up_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].non_field_errors())
+        self.assertContains(response, 'value="foo@example.com"')
+        self.assertTrue(response.context["pow_challenge"])
+        self.assertFalse(User.objects.exists())
+
+    def test_api(self):
+        url = reverse("accounts:api_sign_up")
+        data = self.sign_up_data()
+
+        response = self.client.post(url, data, "application/json")
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(User.objects.exists())
+
+        result = json.loads(response.content)
+        data[CHALLENGE_FIELD] = result[CHALLENGE_FIELD]
+        data[SOLUTION_FIELD] = solve(result[CHALLENGE_FIELD], result["pow_difficulty"])
+
+        response = self.client.post(url, data, "application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.filter(username="foo").exists())
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+
+
+@override_settings(SESSION_ENGINE="accounts.sessions")
+class StatelessSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("foo", "foo@example.com", "x")
+
+        self.first = Client()
+        self.first.force_login(self.user)
+        self.second = Client()
+        self.second.force_login(self.user)
+
+    def is_logged_in(self, client):
+        response = client.get(reverse("accounts:log_out_confirm"))
+        return response.status_code == 200
+
+    def test_log_out(self):
+        self.first.post(reverse("accounts:log_out"))
+
+        # Only this browser is signed out
+        self.assertFalse(self.is_logged_in(self.first))
+        self.assertTrue(self.is_logged_in(self.second))
+
+    def test_log_out_everywhere(self):
+        response = self.first.get(reverse("accounts:log_out_confirm"))
+        self.assertContains(response, 'name="everywhere"')
+
+        self.first.post(reverse("accounts:log_out"), {"everywhere": "1"})
+
+        self.assertFalse(self.is_logged_in(self.first))
+        self.assertFalse(self.is_logged_in(self.second))
+
+    def test_password_change(self):
+        self.first.post(
+            reverse("accounts:change_password"),
+            {
+                "old_password": "x",
+                "new_password1": "Zx9!aaaaQQ",
+                "new_password2": "Zx9!aaaaQQ",
+            },
+        )
+
+        self.assertTrue(self.is_logged_in(self.first))
+        self.assertFalse(self.is_logged_in(self.second))
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.db")
+    def test_database_sessions(self):
+        self.first.force_login(self.user)
+
+        response = self.first.get(reverse("accounts:log_out_confirm"))
+        self.assertNotContains(response, 'name="everywhere"')
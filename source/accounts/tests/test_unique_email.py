@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core import mail
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from accounts.forms import ChangeEmailForm, SignUpForm
+from accounts.models import User, get_duplicate_field, has_unique_email_index
+
+
+def sign_up_data(username, email):
+    return {
+        "username": username,
+        "email": email,
+        "first_name": "Foo",
+        "last_name": "Bar",
+        "password1": "Zx9!aaaaQQ",
+        "password2": "Zx9!aaaaQQ",
+    }
+
+
+class UniqueEmailTests(TransactionTestCase):
+    def setUp(self):
+        if not has_unique_email_index():
+            self.skipTest("The database has no case-insensitive unique email index")
+
+    def test_duplicate_saved_after_validation(self):
+        first = SignUpForm(sign_up_data("foo1", "Foo@example.com"))
+        second = SignUpForm(sign_up_data("foo2", "foo@example.com"))
+
+        # Both are validated before either is saved, the interleaving the query
+        # can't catch
+        self.assertTrue(first.is_valid())
+        self.assertTrue(second.is_valid())
+
+        first.save()
+        with self.assertRaises(IntegrityError) as context:
+            second.save()
+
+        self.assertTrue(second.add_duplicate_error(context.exception))
+        self.assertIn("email", second.errors)
+        self.assertEqual(
+            User.objects.filter(email__iexact="foo@example.com").count(), 1
+        )
+
+    @override_settings(ENABLE_USER_ACTIVATION=False)
+    def test_sign_up_view_shows_form_error(self):
+        User.objects.create_user("foo1", "Foo@example.com", "x")
+
+        response = self.client.post(
+            reverse("accounts:sign_up"), sign_up_data("foo2", "foo@example.com")
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("email", response.context["form"].errors)
+        self.assertEqual(
+            User.objects.filter(email__iexact="foo@example.com").count(), 1
+        )
+
+    @override_settings(ENABLE_ACTIVATION_AFTER_EMAIL_CHANGE=False)
+    def test_change_email_shows_form_error(self):
+        User.objects.create_user("foo1", "Foo@example.com", "x")
+        user = User.objects.create_user("foo2", "bar@example.com", "x")
+        self.client.force_login(user)
+
+        with mock.patch.object(
+            ChangeEmailForm,
+            "add_duplicate_error",
+            autospec=True,
+            side_effect=ChangeEmailForm.add_duplicate_error,
+        ) as add_duplicate_error:
+            response = self.client.post(
+                reverse("accounts:change_email"), {"email": "foo@example.com"}
+            )
+
+        add_duplicate_error.assert_called_once()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("email", response.context["form"].errors)
+        user.refresh_from_db()
+        self.assertEqual(user.email, "bar@example.com")
+
+    @override_settings(ENABLE_ACTIVATION_AFTER_EMAIL_CHANGE=True)
+    def test_change_email_with_activation_checks_first(self):
+        User.objects.create_user("foo1", "Foo@example.com", "x")
+        user = User.objects.create_user("foo2", "bar@example.com", "x")
+        self.client.force_login(user)
+
+        response = self.client.post(
+            reverse("accounts:change_email"), {"email": "foo@example.com"}
+        )
+
+        # No link is sent for an address the activation would fail on
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("email", response.context["form"].errors)
+        self.assertEqual(mail.outbox, [])
+
+
+class DuplicateFieldTests(SimpleTestCase):
+    def error(self, message, constraint=None):
+        error = IntegrityError(message)
+        if constraint is not None:
+            # The psycopg error Django wraps
+            error.__cause__ = Exception(message)
+            error.__cause__.diag = SimpleNamespace(constraint_name=constraint)
+        return error
+
+    def test_constraint_name(self):
+        for constraint, field in [
+            ("accounts_user_email_unique_lower", "email"),
+            ("auth_user_username_key", "username"),
+            ("accounts_activation_code_key", None),
+        ]:
+            with self.subTest(constraint=constraint):
+                error = self.error("duplicate key value", constraint)
+                self.assertEqual(get_duplicate_field(error), field)
+
+        # The message is ignored when the driver names the constraint
+        error = self.error(
+            'Key (lower(email))=(a@b.c) already exists "auth_user_username_key"',
+            "accounts_user_email_unique_lower",
+        )
+        self.assertEqual(get_duplicate_field(error), "email")
+
+    def test_sqlite_message(self):
+        for message, field in [
+            (
+                "UNIQUE constraint failed: index 'accounts_user_email_unique_lower'",
+                "email",
+            ),
+            ("UNIQUE constraint failed: auth_user.username", "username"),
+            ("UNIQUE constraint failed: accounts_activation.code", None),
+            ("NOT NULL constraint failed: auth_user.username", None),
+        ]:
+            with self.subTest(message=message):
+                self.assertEqual(get_duplicate_field(self.error(message)), field)
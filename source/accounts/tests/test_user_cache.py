@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from accounts.backends import CachedModelBackend, UserCache, user_cache
+from accounts.models import User
+
+
+@mock.patch("accounts.backends.is_cache_shared", return_value=True)
+class UserCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("foo", "foo@example.com", "x")
+        self.backend = CachedModelBackend()
+
+    def test_tiers(self, is_cache_shared):
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.backend.get_user(self.user.pk)
+
+        # Another process has the user in the shared tier only
+        with (
+            mock.patch.object(user_cache, "local", OrderedDict()),
+            self.assertNumQueries(0),
+        ):
+            self.backend.get_user(self.user.pk)
+
+        user_cache.invalidate(self.user.pk)
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+
+    def test_copies_are_independent(self, is_cache_shared):
+        first = self.backend.get_user(self.user.pk)
+        second = self.backend.get_user(self.user.pk)
+
+        self.assertIsNot(first, second)
+        self.assertIsNot(first._state, second._state)
+        self.assertEqual(first.session_generation, 0)
+        self.assertEqual(second.session_generation, 0)
+        for field in User._meta.concrete_fields:
+            self.assertEqual(
+                getattr(first, field.attname), getattr(self.user, field.attname)
+            )
+
+        # What a request does to its user doesn't reach the next one
+        first.first_name = "Changed"
+        first._perm_cache = {"accounts.view_user"}
+        first._state.fields_cache["foo"] = object()
+
+        third = self.backend.get_user(self.user.pk)
+        self.assertEqual(third.first_name, "")
+        self.assertFalse(hasattr(third, "_perm_cache"))
+        self.assertEqual(third._state.fields_cache, {})
+        self.assertFalse(third._state.adding)
+        self.assertEqual(third._state.db, "default")
+
+    @override_settings(USER_CACHE_STATS_INTERVAL=10**9)
+    def test_concurrent_counts(self, is_cache_shared):
+        cache = UserCache()
+
+        def count():
+            for _ in range(10000):
+                cache.count("local")
+
+        threads = [threading.Thread(target=count) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(cache.hits["local"], 80000)
+        self.assertEqual(cache.stats()["local"], 1.0)
@@ -0,0 +1,114 @@
+import random
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import password_validation
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, override_settings
+
+from accounts import validators
+from accounts.models import User
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789.-_@ "
+
+
+def get_outcome(validator, password, user=None):
+    try:
+        validator.validate(password, user)
+    except ValidationError as e:
+        return e.messages[0]
+
+    return None
+
+
+class ValidatorEquivalenceTests(SimpleTestCase):
+    """The accounts validators reject the same passwords as Django's."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(PASSWORD_LIST_DIR=Path(directory.name)))
+
+        self.rng = random.Random(42)
+
+    def random_string(self, length):
+        return "".join(self.rng.choice(ALPHABET) for _ in range(length))
+
+    def assertEquivalent(self, django_validator, validator, cases):
+        for password, user in cases:
+            with self.subTest(password=password, user=user and user.username):
+                self.assertEqual(
+                    get_outcome(validator, password, user),
+                    get_outcome(django_validator, password, user),
+                )
+
+    def get_common_cases(self):
+        common = sorted(
+            validators.read_word_list(
+                password_validation.CommonPasswordValidator().DEFAULT_PASSWORD_LIST_PATH
+            )
+        )
+        cases = [(word, None) for word in common[::50]]
+        cases += [(f" {word.upper()} ", None) for word in common[::500]]
+        cases += [
+            (self.random_string(self.rng.randint(0, 16)), None) for _ in range(500)
+        ]
+
+        return cases
+
+    def test_common_password(self):
+        self.assertEquivalent(
+            password_validation.CommonPasswordValidator(),
+            validators.CommonPasswordValidator(),
+            self.get_common_cases(),
+        )
+
+    @override_settings(PASSWORD_LIST_MMAP_SIZE=0)
+    def test_common_password_mmap(self):
+        validator = validators.CommonPasswordValidator()
+        self.assertIsInstance(validator.passwords, validators.SortedWordList)
+
+        self.assertEquivalent(
+            password_validation.CommonPasswordValidator(),
+            validator,
+            self.get_common_cases(),
+        )
+
+    def test_common_password_read_only(self):
+        # A file in place of the directory can't be written even by root
+        with tempfile.NamedTemporaryFile() as file:
+            with override_settings(PASSWORD_LIST_DIR=Path(file.name) / "lists"):
+                with self.assertLogs("accounts.validators", "WARNING"):
+                    validator = validators.CommonPasswordValidator()
+
+        self.assertEquivalent(
+            password_validation.CommonPasswordValidator(),
+            validator,
+            self.get_common_cases(),
+        )
+
+    def test_user_attribute_similarity(self):
+        cases = []
+        for _ in range(50):
+            username = self.random_string(self.rng.randint(3, 12))
+            user = User(
+                username=username,
+                email=f"{username}@{self.random_string(6)}.com",
+                first_name=self.random_string(self.rng.randint(0, 8)),
+                last_name=self.random_string(self.rng.randint(0, 10)),
+            )
+            cases += [
+                (user.username, user),
+                (user.username[::-1] + "1", user),
+                (user.email.upper(), user),
+                ("".join(self.rng.sample(user.email, len(user.email))), user),
+                (self.random_string(self.rng.randint(4, 20)), user),
+                (self.random_string(200), user),
+            ]
+        cases.append(("anything", None))
+
+        self.assertEquivalent(
+            password_validation.UserAttributeSimilarityValidator(),
+            validators.UserAttributeSimilarityValidator(),
+            cases,
+        )
@@ -0,0 +1,46 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from accounts.models import Activation, User
+
+
+@skipUnless(
+    connection.features.can_return_columns_from_insert,
+    "The activations are consumed with DELETE ... RETURNING",
+)
+class ActivationWriteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("foo", "foo@example.com", "x")
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+
+    def test_activate(self):
+        code = Activation.objects.issue(self.user).code
+
+        # Consuming the activation and activating the user
+        with self.assertNumQueries(2):
+            self.assertEqual(Activation.objects.activate(code), self.user.pk)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+        self.assertFalse(Activation.objects.exists())
+
+    def test_activate_double_click(self):
+        code = Activation.objects.issue(self.user).code
+        Activation.objects.activate(code)
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(Activation.objects.activate(code))
+
+    def test_change_email(self):
+        code = Activation.objects.issue(self.user, email="bar@example.com").code
+
+        # The consume and the update run in a savepoint
+        with self.assertNumQueries(4):
+            self.assertEqual(Activation.objects.change_email(code), self.user.pk)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "bar@example.com")
+        self.assertFalse(Activation.objects.exists())
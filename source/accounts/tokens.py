@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+from django.utils.http import base36_to_int
+
+from .backends import CachedModelBackend, get_session_generation, user_cache
+from .models import SessionGeneration
+
+SALT = "accounts.tokens"
+
+
+def make_token(user):
+    """
+    Returns a compact signed bearer token: the user id, the session generation and a
+    prefix of the session hash, so logging out and changing the password revoke it.
+    """
+    generation = get_session_generation(user.pk) or 0
+    value = f"{user.pk}.{generation}.{user.get_session_auth_hash()[:12]}"
+
+    return signing.TimestampSigner(salt=SALT).sign(value)
+
+
+def get_token_user(token):
+    try:
+        value = signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.API_TOKEN_AGE
+        )
+        user_id, generation, auth_hash = value.split(".")
+    except (signing.BadSignature, ValueError):
+        return None
+
+    user = CachedModelBackend().get_user(int(user_id))
+    if not user or str(user.session_generation) != generation:
+        return None
+
+    if not constant_time_compare(user.get_session_auth_hash()[:12], auth_hash):
+        return None
+
+    return user
+
+
+def revoke_tokens(user):
+    SessionGeneration.objects.bump(user)
+    user_cache.invalidate(user.pk)
+
+
+class LoginLinkTokenGenerator(PasswordResetTokenGenerator):
+    """
+    Signs the login links like the password restore tokens, with another salt and
+    LOGIN_LINK_TIMEOUT. The hash covers last_login, which the redemption updates, so
+    a link works once.
+    """
+
+    key_salt = "accounts.tokens.LoginLinkTokenGenerator"
+
+    def check_token(self, user, token):
+        if not super().check_token(user, token):
+            return False
+
+        timestamp = base36_to_int(token.split("-")[0])
+        return self._num_seconds(self._now()) - timestamp <= settings.LOGIN_LINK_TIMEOUT
+
+
+login_link_token_generator = LoginLinkTokenGenerator()
@@ -1,11 +1,24 @@
 from django.urls import path
 
+from .api import (
+    ApiActivateView,
+    ApiChangeEmailActivateView,
+    ApiChangeEmailView,
+    ApiLogInView,
+    ApiLogOutView,
+    ApiRestorePasswordConfirmView,
+    ApiRestorePasswordView,
+    ApiSignUpView,
+)
 from .views import (
     ActivateView,
+    AvailabilityView,
     ChangeEmailActivateView,
     ChangeEmailView,
     ChangePasswordView,
     ChangeProfileView,
+    LogInViaLinkConfirmView,
+    LogInViaLinkView,
     LogInView,
     LogOutConfirmView,
     LogOutView,
@@ -21,6 +34,12 @@ app_name = "accounts"
 
 urlpatterns = [
     path("log-in/", LogInView.as_view(), name="log_in"),
+    path("log-in/link/", LogInViaLinkView.as_view(), name="log_in_via_link"),
+    path(
+        "log-in/link/<uidb64>/<token>/",
+        LogInViaLinkConfirmView.as_view(),
+        name="log_in_via_link_confirm",
+    ),
     path("log-out/confirm/", LogOutConfirmView.as_view(), name="log_out_confirm"),
     path("log-out/", LogOutView.as_view(), name="log_out"),
     path(
@@ -29,6 +48,7 @@ urlpatterns = [
         name="resend_activation_code",
     ),
     path("sign-up/", SignUpView.as_view(), name="sign_up"),
+    path("availability/", AvailabilityView.as_view(), name="availability"),
     path("activate/<code>/", ActivateView.as_view(), name="activate"),
     path("restore/password/", RestorePasswordView.as_view(), name="restore_password"),
     path(
@@ -50,4 +70,24 @@ urlpatterns = [
         ChangeEmailActivateView.as_view(),
         name="change_email_activation",
     ),
+    path("api/log-in/", ApiLogInView.as_view(), name="api_log_in"),
+    path("api/log-out/", ApiLogOutView.as_view(), name="api_log_out"),
+    path("api/sign-up/", ApiSignUpView.as_view(), name="api_sign_up"),
+    path("api/activate/", ApiActivateView.as_view(), name="api_activate"),
+    path(
+        "api/restore/password/",
+        ApiRestorePasswordView.as_view(),
+        name="api_restore_password",
+    ),
+    path(
+        "api/restore/password/confirm/",
+        ApiRestorePasswordConfirmView.as_view(),
+        name="api_restore_password_confirm",
+    ),
+    path("api/change/email/", ApiChangeEmailView.as_view(), name="api_change_email"),
+    path(
+        "api/change/email/activate/",
+        ApiChangeEmailActivateView.as_view(),
+        name="api_change_email_activation",
+    ),
 ]
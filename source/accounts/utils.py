@@ -52,6 +52,20 @@ def send_reset_password_email(request, email, token, uid):
     send_mail(email, "restore_password_email", context)
 
 
+def send_login_link_email(request, email, token, uid):
+    context = {
+        "subject": _("Log in"),
+        "uri": request.build_absolute_uri(
+            reverse(
+                "accounts:log_in_via_link_confirm",
+                kwargs={"uidb64": uid, "token": token},
+            )
+        ),
+    }
+
+    send_mail(email, "login_link", context)
+
+
 def send_forgotten_username_email(email, username):
     context = {
         "subject": _("Your username"),
@@ -0,0 +1,206 @@
+import gzip
+import hashlib
+import logging
+import mmap
+import os
+import re
+import tempfile
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import password_validation
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.utils.translation import gettext as _
+
+from .breached import BreachedPasswords
+
+logger = logging.getLogger(__name__)
+
+
+class SortedWordList:
+    """A sorted file of newline-separated words searched in place through mmap."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self.buffer = (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            )
+
+    def __contains__(self, word):
+        key = word.encode()
+        buffer = self.buffer
+
+        low, high = 0, len(buffer)
+        while low < high:
+            middle = (low + high) // 2
+            start = buffer.rfind(b"\n", 0, middle) + 1
+            end = buffer.find(b"\n", start)
+            if end == -1:
+                end = len(buffer)
+
+            line = buffer[start:end]
+            if line == key:
+                return True
+
+            if line < key:
+                low = end + 1
+            else:
+                high = start
+
+        return False
+
+
+def read_word_list(path):
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return {x.strip() for x in f}
+    except OSError:
+        with open(path) as f:
+            return {x.strip() for x in f}
+
+
+def compile_word_list(path):
+    """
+    Returns the path of a sorted, uncompressed copy of the word list in
+    PASSWORD_LIST_DIR, writing it if the source has changed.
+    """
+    stat = os.stat(path)
+    version = hashlib.md5(
+        f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+    ).hexdigest()[:12]
+
+    directory = settings.PASSWORD_LIST_DIR
+    target = directory / f"{os.path.basename(path).split('.')[0]}-{version}.txt"
+    if target.exists():
+        return target
+
+    words = sorted(word.encode() for word in read_word_list(path) if word)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"\n".join(words))
+    os.replace(tmp, target)
+
+    return target
+
+
+def load_word_list(path):
+    # Large lists are shared by the workers through the page cache, small ones are
+    # faster to search in a set
+    if os.path.getsize(path) > settings.PASSWORD_LIST_MMAP_SIZE:
+        return SortedWordList(path)
+
+    with open(path, "rb") as f:
+        return frozenset(f.read().decode().split("\n"))
+
+
+class CommonPasswordValidator(password_validation.CommonPasswordValidator):
+    """
+    Django's validator loading a precompiled, uncompressed copy of the list instead
+    of decompressing it in every process. The lookups cost the same as Django's,
+    the gain is the memory of the large lists that are shared through mmap.
+
+    When PASSWORD_LIST_DIR isn't writable the list is loaded like Django does.
+    """
+
+    def __init__(self, password_list_path=None):
+        if password_list_path is None:
+            password_list_path = self.DEFAULT_PASSWORD_LIST_PATH
+
+        try:
+            self.passwords = load_word_list(compile_word_list(password_list_path))
+        except OSError as e:
+            logger.warning(
+                "Can't compile the password list %s: %s", password_list_path, e
+            )
+            self.passwords = read_word_list(password_list_path)
+
+
+class UserAttributeSimilarityValidator(
+    password_validation.UserAttributeSimilarityValidator
+):
+    """
+    Django's validator without a SequenceMatcher per attribute part. The quick_ratio
+    it compares is the size of the multiset intersection of the characters, which is
+    counted here directly, after an upper bound from the lengths.
+    """
+
+    def validate(self, password, user=None):
+        if not user:
+            return
+
+        password = password.lower()
+        password_chars = Counter(password)
+
+        for attribute_name in self.user_attributes:
+            value = getattr(user, attribute_name, None)
+            if not value or not isinstance(value, str):
+                continue
+
+            value_lower = value.lower()
+            value_parts = re.split(r"\W+", value_lower) + [value_lower]
+            for value_part in value_parts:
+                if password_validation.exceeds_maximum_length_ratio(
+                    password, self.max_similarity, value_part
+                ):
+                    continue
+
+                if self.get_similarity(password, password_chars, value_part) < (
+                    self.max_similarity
+                ):
+                    continue
+
+                try:
+                    verbose_name = str(
+                        user._meta.get_field(attribute_name).verbose_name
+                    )
+                except FieldDoesNotExist:
+                    verbose_name = attribute_name
+
+                raise ValidationError(
+                    self.get_error_message(),
+                    code="password_too_similar",
+                    params={"verbose_name": verbose_name},
+                )
+
+    def get_similarity(self, password, password_chars, value_part):
+        length = len(password) + len(value_part)
+        if not length:
+            return 1.0
+
+        # The real_quick_ratio bound, when it is below the limit nothing is counted
+        if 2.0 * min(len(password), len(value_part)) / length < self.max_similarity:
+            return 0.0
+
+        matches = sum((password_chars & Counter(value_part)).values())
+        return 2.0 * matches / length
+
+
+class BreachedPasswordValidator:
+    """
+    Rejects the passwords found in the breached passwords file at
+    BREACHED_PASSWORDS_PATH, see `manage.py build_breached_passwords`. Does nothing
+    when the path isn't set, or when the file can't be read, which is logged.
+    """
+
+    def __init__(self, path=None):
+        path = path or settings.BREACHED_PASSWORDS_PATH
+        self.passwords = None
+
+        if path:
+            try:
+                self.passwords = BreachedPasswords(path)
+            except (OSError, ValueError) as e:
+                logger.error("Can't load the breached passwords %s: %s", path, e)
+
+    def validate(self, password, user=None):
+        if self.passwords is not None and password in self.passwords:
+            raise ValidationError(self.get_error_message(), code="password_breached")
+
+    def get_error_message(self):
+        return _("This password has appeared in a data breach.")
+
+    def get_help_text(self):
+        return _("Your password can’t be one that has appeared in a data breach.")
@@ -16,12 +16,14 @@ from django.contrib.auth.views import (
 from django.contrib.auth.views import (
     PasswordResetDoneView as BasePasswordResetDoneView,
 )
-from django.shortcuts import get_object_or_404, redirect
-from django.utils.crypto import get_random_string
+from django.db import IntegrityError, transaction
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect
+from django.utils import timezone
 from django.utils.decorators import method_decorator
-from django.utils.encoding import force_bytes
+from django.utils.encoding import force_bytes, force_str
 from django.utils.http import url_has_allowed_host_and_scheme as is_safe_url
-from django.utils.http import urlsafe_base64_encode
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.utils.translation import gettext_lazy as _
 from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_protect
@@ -29,9 +31,12 @@ from django.views.decorators.debug import sensitive_post_parameters
 from django.views.generic import FormView, View
 from django.views.generic.base import TemplateView
 
+from . import audit
+from .existence import is_available
 from .forms import (
     ChangeEmailForm,
     ChangeProfileForm,
+    LogInViaLinkForm,
     RemindUsernameForm,
     ResendActivationCodeForm,
     ResendActivationCodeViaEmailForm,
@@ -42,11 +47,16 @@ from .forms import (
     SignInViaUsernameForm,
     SignUpForm,
 )
-from .models import Activation
+from .last_login import track_token
+from .models import Activation, AuditEvent, get_duplicate_field, users_updated
+from .pow import check_proof_of_work, make_challenge
+from .ratelimit import get_client_ip, is_rate_limited
+from .tokens import login_link_token_generator, revoke_tokens
 from .utils import (
     send_activation_change_email,
     send_activation_email,
     send_forgotten_username_email,
+    send_login_link_email,
     send_reset_password_email,
 )
 
@@ -60,6 +70,32 @@ class GuestOnlyView(View):
         return super().dispatch(request, *args, **kwargs)
 
 
+class ProofOfWorkMixin:
+    """
+    Asks the browser to solve a proof-of-work challenge before the form is processed
+    when the form is submitted more often than usual.
+    """
+
+    def get_context_data(self, **kwargs):
+        if settings.POW_ENABLED:
+            kwargs["pow_challenge"] = make_challenge(self.request, type(self).__name__)
+
+        return super().get_context_data(**kwargs)
+
+    def post(self, request, *args, **kwargs):
+        if settings.POW_ENABLED and not check_proof_of_work(
+            request, type(self).__name__
+        ):
+            # Shown again with what was typed in and a new challenge
+            form = self.get_form()
+            form.add_error(
+                None, _("The security check has failed or expired. Try again.")
+            )
+            return self.form_invalid(form)
+
+        return super().post(request, *args, **kwargs)
+
+
 class LogInView(GuestOnlyView, FormView):
     template_name = "accounts/log_in.html"
 
@@ -96,6 +132,7 @@ class LogInView(GuestOnlyView, FormView):
                 request.session.set_expiry(0)
 
         login(request, form.user_cache)
+        audit.record(AuditEvent.Event.LOG_IN, request, form.user_cache)
 
         redirect_to = request.POST.get(
             REDIRECT_FIELD_NAME, request.GET.get(REDIRECT_FIELD_NAME)
@@ -114,41 +151,114 @@ class LogInView(GuestOnlyView, FormView):
 
         return redirect(settings.LOGIN_REDIRECT_URL)
 
+    def form_invalid(self, form):
+        identifier = form.data.get(form.field_order[0], "")
+        audit.record(AuditEvent.Event.LOG_IN_FAILED, self.request, details=identifier)
 
-class SignUpView(GuestOnlyView, FormView):
-    template_name = "accounts/sign_up.html"
-    form_class = SignUpForm
+        return super().form_invalid(form)
+
+    def get_context_data(self, **kwargs):
+        kwargs["login_links_enabled"] = settings.ENABLE_LOGIN_LINKS
+        return super().get_context_data(**kwargs)
+
+
+class LoginLinksEnabledMixin:
+    def dispatch(self, request, *args, **kwargs):
+        if not settings.ENABLE_LOGIN_LINKS:
+            raise Http404
+
+        return super().dispatch(request, *args, **kwargs)
+
+
+class LogInViaLinkView(
+    LoginLinksEnabledMixin, ProofOfWorkMixin, GuestOnlyView, FormView
+):
+    template_name = "accounts/log_in_via_link.html"
+    form_class = LogInViaLinkForm
 
     def form_valid(self, form):
-        request = self.request
-        user = form.save(commit=False)
+        email = form.cleaned_data["email"]
 
-        if settings.DISABLE_USERNAME:
-            # Set a temporary username
-            user.username = get_random_string(length=20)
-        else:
-            user.username = form.cleaned_data["username"]
+        # The same answer for the unknown addresses, so the page doesn't tell who
+        # has an account
+        user = User.objects.filter(email__iexact=email, is_active=True).first()
+        if user:
+            token = login_link_token_generator.make_token(user)
+            track_token(user)
+            uid = urlsafe_base64_encode(force_bytes(user.pk))
 
-        if settings.ENABLE_USER_ACTIVATION:
-            user.is_active = False
+            send_login_link_email(self.request, user.email, token, uid)
 
-        # Create a user record
-        user.save()
+        messages.success(
+            self.request,
+            _("If an account uses this email, a link to log in has been sent to it."),
+        )
 
-        # Change the username to the "user_ID" form
-        if settings.DISABLE_USERNAME:
-            user.username = f"user_{user.id}"
-            user.save()
+        return redirect("accounts:log_in_via_link")
 
-        if settings.ENABLE_USER_ACTIVATION:
-            code = get_random_string(20)
 
-            act = Activation()
-            act.code = code
-            act.user = user
-            act.save()
+class LogInViaLinkConfirmView(LoginLinksEnabledMixin, GuestOnlyView, TemplateView):
+    """
+    Logs in with a link sent by LogInViaLinkView. The link only shows a button, so
+    the mail scanners that open the links don't use them up.
+    """
+
+    template_name = "accounts/log_in_via_link_confirm.html"
 
-            send_activation_email(request, user.email, code)
+    def post(self, request, uidb64, token):
+        try:
+            user = User.objects.get(pk=force_str(urlsafe_base64_decode(uidb64)))
+        except (TypeError, ValueError, OverflowError, User.DoesNotExist):
+            user = None
+
+        # The token covers last_login, updating it only if nobody else has done it in
+        # the meantime makes the link single-use
+        now = timezone.now()
+        is_valid = (
+            user is not None
+            and user.is_active
+            and login_link_token_generator.check_token(user, token)
+            and User.objects.filter(pk=user.pk, last_login=user.last_login).update(
+                last_login=now
+            )
+        )
+        if not is_valid:
+            messages.error(
+                request,
+                _(
+                    "The link is invalid or expired, possibly because it has already been used."
+                ),
+            )
+            return redirect("accounts:log_in_via_link")
+
+        # Already stored, so the user_logged_in receiver has nothing to write
+        user.last_login = now
+        users_updated.send(sender=User, user_ids=[user.pk])
+        login(request, user)
+        audit.record(AuditEvent.Event.LOG_IN, request, user)
+
+        return redirect(settings.LOGIN_REDIRECT_URL)
+
+
+class SignUpView(ProofOfWorkMixin, GuestOnlyView, FormView):
+    template_name = "accounts/sign_up.html"
+    form_class = SignUpForm
+
+    def form_valid(self, form):
+        request = self.request
+        try:
+            user = form.save()
+        except IntegrityError as e:
+            if not form.add_duplicate_error(e):
+                raise
+            return self.form_invalid(form)
+
+        audit.record(AuditEvent.Event.SIGN_UP, request, user)
+
+        if settings.ENABLE_USER_ACTIVATION:
+            act = Activation.objects.issue(user)
+
+            send_activation_email(request, user.email, act.code)
 
             messages.success(
                 request,
@@ -167,18 +277,36 @@ class SignUpView(GuestOnlyView, FormView):
         return redirect("index")
 
 
+class AvailabilityView(View):
+    """
+    Tells the sign-up page whether a username or an email is free without posting
+    the whole form. It doesn't touch the session, messages or templates.
+    """
+
+    @staticmethod
+    def get(request):
+        if is_rate_limited(
+            f"availability:{get_client_ip(request)}", settings.AVAILABILITY_RATE_LIMIT
+        ):
+            return JsonResponse({"error": _("Too many requests.")}, status=429)
+
+        result = {}
+        for kind in ("username", "email"):
+            value = request.GET.get(kind, "").strip()
+            if value and len(value) <= 254:
+                result[kind] = is_available(kind, value)
+
+        return JsonResponse(result)
+
+
 class ActivateView(View):
     @staticmethod
     def get(request, code):
-        act = get_object_or_404(Activation, code=code)
+        user_id = Activation.objects.activate(code)
+        if not user_id:
+            raise Http404
 
-        # Activate profile
-        user: User = act.user
-        user.is_active = True
-        user.save()
-
-        # Remove the activation record
-        act.delete()
+        audit.record(AuditEvent.Event.ACTIVATION, request, user_id=user_id)
 
         messages.success(request, _("You have successfully activated your account!"))
 
@@ -202,14 +330,9 @@ class ResendActivationCodeView(GuestOnlyView, FormView):
         if activation:
             activation.delete()
 
-        code = get_random_string(length=20)
-
-        act = Activation()
-        act.code = code
-        act.user = user
-        act.save()
+        act = Activation.objects.issue(user)
 
-        send_activation_email(self.request, user.email, code)
+        send_activation_email(self.request, user.email, act.code)
 
         messages.success(
             self.request,
@@ -219,7 +342,7 @@ class ResendActivationCodeView(GuestOnlyView, FormView):
         return redirect("accounts:resend_activation_code")
 
 
-class RestorePasswordView(GuestOnlyView, FormView):
+class RestorePasswordView(ProofOfWorkMixin, GuestOnlyView, FormView):
     template_name = "accounts/restore_password.html"
 
     @staticmethod
@@ -232,12 +355,14 @@ class RestorePasswordView(GuestOnlyView, FormView):
     def form_valid(self, form):
         user: User = form.user_cache
         token = default_token_generator.make_token(user)
+        track_token(user)
         uid = urlsafe_base64_encode(force_bytes(user.pk))
 
         if isinstance(uid, bytes):
             uid = uid.decode()
 
         send_reset_password_email(self.request, user.email, token, uid)
+        audit.record(AuditEvent.Event.PASSWORD_RESET_REQUEST, self.request, user)
 
         return redirect("accounts:restore_password_done")
 
@@ -262,7 +387,7 @@ class ChangeProfileView(FormView, LoginRequiredMixin):
             return initial
         user.first_name = form.cleaned_data["first_name"]
         user.last_name = form.cleaned_data["last_name"]
-        user.save()
+        user.save(update_fields=["first_name", "last_name"])
 
         messages.success(self.request, _("Profile data has been successfully updated."))
 
@@ -294,15 +419,10 @@ class ChangeEmailView(FormView, LoginRequiredMixin):
         email = form.cleaned_data["email"]
 
         if settings.ENABLE_ACTIVATION_AFTER_EMAIL_CHANGE:
-            code = get_random_string(length=20)
+            act = Activation.objects.issue(user, email=email)
 
-            act = Activation()
-            act.code = code
-            act.user = user
-            act.email = email
-            act.save()
-
-            send_activation_change_email(self.request, email, code)
+            send_activation_change_email(self.request, email, act.code)
+            audit.record(AuditEvent.Event.EMAIL_CHANGE_REQUEST, self.request, user)
 
             messages.success(
                 self.request,
@@ -312,7 +432,16 @@ class ChangeEmailView(FormView, LoginRequiredMixin):
             )
         else:
             user.email = email
-            user.save()
+            try:
+                with transaction.atomic():
+                    user.save(update_fields=["email"])
+            except IntegrityError as e:
+                if not form.add_duplicate_error(e):
+                    raise
+                user.refresh_from_db(fields=["email"])
+                return self.form_invalid(form)
+
+            audit.record(AuditEvent.Event.EMAIL_CHANGE, self.request, user)
 
             messages.success(self.request, _("Email successfully changed."))
 
@@ -322,22 +451,26 @@ class ChangeEmailView(FormView, LoginRequiredMixin):
 class ChangeEmailActivateView(View):
     @staticmethod
     def get(request, code):
-        act = get_object_or_404(Activation, code=code)
+        try:
+            user_id = Activation.objects.change_email(code)
+        except IntegrityError as e:
+            if get_duplicate_field(e) != "email":
+                raise
 
-        # Change the email
-        user: User = act.user
-        user.email = act.email
-        user.save()
+            messages.error(request, _("You can not use this mail."))
+            return redirect("accounts:change_email")
 
-        # Remove the activation record
-        act.delete()
+        if not user_id:
+            raise Http404
+
+        audit.record(AuditEvent.Event.EMAIL_CHANGE, request, user_id=user_id)
 
         messages.success(request, _("You have successfully changed your email!"))
 
         return redirect("accounts:change_email")
 
 
-class RemindUsernameView(FormView, GuestOnlyView):
+class RemindUsernameView(ProofOfWorkMixin, FormView, GuestOnlyView):
     template_name = "accounts/remind_username.html"
     form_class = RemindUsernameForm
 
@@ -372,7 +505,8 @@ class RestorePasswordConfirmView(BasePasswordResetConfirmView):
 
     def form_valid(self, form):
         # Change the password
-        form.save()
+        user = form.save()
+        audit.record(AuditEvent.Event.PASSWORD_RESET, self.request, user)
 
         messages.success(
             self.request,
@@ -389,6 +523,23 @@ class RestorePasswordDoneView(BasePasswordResetDoneView):
 class LogOutConfirmView(LoginRequiredMixin, TemplateView):
     template_name = "accounts/log_out_confirm.html"
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        # The stateless sessions are revoked with the generation of the user
+        context["can_log_out_everywhere"] = (
+            settings.SESSION_ENGINE == "accounts.sessions"
+        )
+
+        return context
+
 
 class LogOutView(BaseLogoutView):
     template_name = "accounts/log_out.html"
+
+    def post(self, request, *args, **kwargs):
+        # Revokes the sessions and the API tokens of the other devices as well
+        if request.POST.get("everywhere") and request.user.is_authenticated:
+            revoke_tokens(request.user)
+
+        return super().post(request, *args, **kwargs)
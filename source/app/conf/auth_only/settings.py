@@ -0,0 +1,14 @@
+from ..production.settings import *
+from ..production.settings import INSTALLED_APPS
+
+# A lean profile for nodes that only serve the accounts endpoints: the admin and
+# staticfiles apps are not loaded, so their modules are never imported by workers.
+INSTALLED_APPS = [
+    app
+    for app in INSTALLED_APPS
+    if app not in ("django.contrib.admin", "django.contrib.staticfiles")
+]
+
+# Budgets checked by `manage.py startup_report` for the app.settings -> app.wsgi path.
+STARTUP_IMPORT_TIME_BUDGET = 400
+STARTUP_MEMORY_BUDGET = 40
@@ -29,9 +29,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "main.concurrency.ConcurrencyLimitMiddleware",
+    "main.profiling.ProfilingMiddleware",
+    "main.traffic.TrafficCaptureMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
-    "django.middleware.locale.LocaleMiddleware",
+    "main.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -80,17 +83,20 @@ DATABASES = {
 
 AUTH_PASSWORD_VALIDATORS = [
     {
-        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+        "NAME": "accounts.validators.UserAttributeSimilarityValidator",
     },
     {
         "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
     },
     {
-        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+        "NAME": "accounts.validators.CommonPasswordValidator",
     },
     {
         "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
     },
+    {
+        "NAME": "accounts.validators.BreachedPasswordValidator",
+    },
 ]
 
 ENABLE_USER_ACTIVATION = True
@@ -104,6 +110,141 @@ USE_REMEMBER_ME = False
 RESTORE_PASSWORD_VIA_EMAIL_OR_USERNAME = True
 EMAIL_ACTIVATION_AFTER_CHANGING = True
 
+# Users of authenticated requests are served from a per-process LRU in front of the
+# default cache. The invalidations have to reach every worker, so the cache is only
+# used with a shared CACHES backend (not LocMemCache or DummyCache), otherwise the
+# users are loaded from the database on each request like with ModelBackend.
+AUTHENTICATION_BACKENDS = ["accounts.backends.CachedModelBackend"]
+USER_CACHE_SIZE = 1000
+USER_CACHE_TIMEOUT = 300
+USER_CACHE_STATS_INTERVAL = 1000
+
+# Keeps the sessions in compact signed cookies instead of the database. Logging out
+# drops the cookie of that browser only, the log-out page offers to revoke every
+# session of the user. Set SESSION_COOKIE_ENCRYPTION_KEY to a Fernet
+# key to encrypt the cookies as well (requires the cryptography package).
+USE_STATELESS_SESSIONS = False
+if USE_STATELESS_SESSIONS:
+    SESSION_ENGINE = "accounts.sessions"
+SESSION_COOKIE_ENCRYPTION_KEY = None
+
+# A Bloom filter of the emails and usernames lets the sign-up form skip the database
+# for identifiers that are definitely new. It lives in EXISTENCE_INDEX_PATH, a
+# memory-mapped file kept up to date by all the workers (a single node), and is off
+# without it. Build the file with `manage.py rebuild_existence_index` before
+# starting the workers, and again after importing users in bulk.
+USE_EXISTENCE_INDEX = True
+EXISTENCE_INDEX_PATH = None
+EXISTENCE_INDEX_CAPACITY = 2_000_000
+EXISTENCE_INDEX_ERROR_RATE = 0.001
+
+# The availability endpoint of the sign-up page: cache lifetime of the answers in
+# seconds and the number of requests allowed per IP address and minute.
+AVAILABILITY_CACHE_TIMEOUT = 30
+AVAILABILITY_RATE_LIMIT = 30
+
+# Lifetime of the bearer tokens of the JSON API in seconds
+API_TOKEN_AGE = 60 * 60 * 24 * 14
+
+# The admin counts filtered lists up to ADMIN_COUNT_LIMIT rows and runs the bulk
+# actions in batches of ADMIN_BATCH_SIZE users
+ADMIN_COUNT_LIMIT = 10000
+ADMIN_BATCH_SIZE = 1000
+
+# Profiles one request in PROFILING_SAMPLE_RATE (0 disables sampling) and the requests
+# with a signed X-Profile header, see `manage.py profile_report`
+PROFILING_ENABLED = False
+PROFILING_SAMPLE_RATE = 1000
+PROFILING_TOKEN_AGE = 60 * 60
+PROFILING_DIR = CONTENT_DIR / "tmp" / "profiles"
+PROFILING_KEEP = 50
+
+# Number of prerendered form layouts kept by the {% accounts_form %} tag
+FORM_MARKUP_CACHE_SIZE = 256
+
+# Authentication events are buffered in memory (up to AUDIT_BUFFER_SIZE, then new
+# events are dropped) and written in batches every AUDIT_FLUSH_INTERVAL seconds or
+# when AUDIT_BATCH_SIZE events are waiting, see `manage.py purge_audit_events`. A
+# process starts its flush thread with its first event
+AUDIT_ENABLED = True
+AUDIT_BUFFER_SIZE = 10000
+AUDIT_BATCH_SIZE = 500
+AUDIT_FLUSH_INTERVAL = 5
+AUDIT_RETENTION_DAYS = 90
+
+# last_login is only written when the stored value is older than
+# LAST_LOGIN_UPDATE_INTERVAL seconds (0 writes on every log-in). With
+# LAST_LOGIN_BUFFERED the writes are batched like the audit events. The password
+# reset and log-in link tokens are invalidated by a change of last_login, so the
+# users with outstanding tokens are always written through. That is tracked in the
+# default cache: without a shared one every log-in is written through.
+LAST_LOGIN_UPDATE_INTERVAL = 3600
+LAST_LOGIN_BUFFERED = False
+LAST_LOGIN_BUFFER_SIZE = 10000
+LAST_LOGIN_BATCH_SIZE = 500
+LAST_LOGIN_FLUSH_INTERVAL = 5
+
+# The sign-up, restore password and remind username forms, and the sign-up and
+# restore password API endpoints, ask for a proof-of-work once they are submitted
+# more than POW_RATE_THRESHOLD times a minute (from all clients). The difficulty is
+# the number of leading zero bits of a SHA-256 hash. Needs a shared cache, where
+# the solved challenges are recorded
+POW_ENABLED = False
+POW_RATE_THRESHOLD = 30
+POW_MIN_DIFFICULTY = 12
+POW_MAX_DIFFICULTY = 20
+POW_CHALLENGE_AGE = 600
+
+# Every process admits up to an adaptive number of concurrent requests, the limit
+# shrinks when responses get slower than CONCURRENCY_LATENCY_TARGET seconds. The
+# submissions of the sheddable views may use half of it, the critical views and
+# the authenticated requests up to twice the limit. Rejected requests get a 503.
+# The limit is per process and needs threaded WSGI workers (gunicorn --threads,
+# uWSGI or mod_wsgi threads), sync workers and ASGI servers admit every request
+CONCURRENCY_LIMIT_ENABLED = False
+CONCURRENCY_INITIAL_LIMIT = 20
+CONCURRENCY_MIN_LIMIT = 2
+CONCURRENCY_MAX_LIMIT = 200
+CONCURRENCY_LATENCY_TARGET = 1.0
+CONCURRENCY_RETRY_AFTER = 2
+CONCURRENCY_SHEDDABLE_VIEWS = [
+    "accounts:log_in",
+    "accounts:sign_up",
+    "accounts:log_in_via_link",
+    "accounts:restore_password",
+    "accounts:remind_username",
+    "accounts:resend_activation_code",
+    "accounts:api_log_in",
+    "accounts:api_sign_up",
+    "accounts:api_restore_password",
+    "accounts:restore_password_confirm",
+    "accounts:api_restore_password_confirm",
+]
+CONCURRENCY_CRITICAL_VIEWS = ["index", "change_language", "set_language"]
+
+# The password lists of the validators are compiled into sorted, uncompressed files.
+# Lists larger than PASSWORD_LIST_MMAP_SIZE bytes are searched in place through
+# mmap and shared by the workers, smaller ones are loaded into a set. When the
+# directory isn't writable the lists are loaded into memory in every process
+PASSWORD_LIST_DIR = CONTENT_DIR / "tmp" / "password-lists"
+PASSWORD_LIST_MMAP_SIZE = 1024 * 1024
+
+# A file of breached password hashes built by `manage.py build_breached_passwords`,
+# the validator is skipped when it isn't set
+BREACHED_PASSWORDS_PATH = None
+
+# Records the shape of every request (no values) for `manage.py replay_traffic`,
+# one JSON lines file per process. A file larger than TRAFFIC_CAPTURE_MAX_SIZE
+# bytes is renamed to PID.old.jsonl, replacing the previous one
+TRAFFIC_CAPTURE_ENABLED = False
+TRAFFIC_CAPTURE_DIR = CONTENT_DIR / "tmp" / "traffic"
+TRAFFIC_CAPTURE_MAX_SIZE = 64 * 1024 * 1024
+
+# Passwordless log-in: a signed link valid for LOGIN_LINK_TIMEOUT seconds is sent to
+# the email of the user and can be used once
+ENABLE_LOGIN_LINKS = False
+LOGIN_LINK_TIMEOUT = 15 * 60
+
 MESSAGE_STORAGE = "django.contrib.messages.storage.cookie.CookieStorage"
 
 USE_I18N = True
@@ -130,6 +271,11 @@ STATICFILES_DIRS = [
 
 LOCALE_PATHS = [CONTENT_DIR / "locale"]
 
+# The negotiated language is memoized per language cookie and Accept-Language
+# header, and the catalogs of all LANGUAGES are loaded when the handler is built
+LOCALE_CACHE_SIZE = 1024
+LOCALE_PRELOAD_CATALOGS = True
+
 SIGN_UP_FIELDS = [
     "username",
     "first_name",
@@ -142,3 +288,8 @@ if DISABLE_USERNAME:
     SIGN_UP_FIELDS = ["first_name", "last_name", "email", "password1", "password2"]
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Budgets for `manage.py startup_report`: import time in milliseconds and traced
+# Python allocations in megabytes for the app.settings -> app.wsgi startup path.
+STARTUP_IMPORT_TIME_BUDGET = 600
+STARTUP_MEMORY_BUDGET = 60
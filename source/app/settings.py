@@ -1,8 +1,11 @@
 import os
 
 IS_PRODUCTION = os.environ.get("IS_PRODUCTION")
+IS_AUTH_ONLY = os.environ.get("IS_AUTH_ONLY")
 
-if IS_PRODUCTION:
+if IS_AUTH_ONLY:
+    from .conf.auth_only.settings import *
+elif IS_PRODUCTION:
     from .conf.production.settings import *
 else:
     from .conf.development.settings import *
@@ -1,16 +1,21 @@
+from django.apps import apps
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib import admin
 from django.urls import include, path
 from main.views import ChangeLanguageView, IndexPageView
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
     path("", IndexPageView.as_view(), name="index"),
     path("i18n/", include("django.conf.urls.i18n")),
     path("language/", ChangeLanguageView.as_view(), name="change_language"),
     path("accounts/", include("accounts.urls")),
 ]
 
+# The admin site is only imported when the app is installed (see the auth-only profile)
+if apps.is_installed("django.contrib.admin"):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path("admin/", admin.site.urls))
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,52 @@
+// Checks whether the username and the email are free while the sign-up form is filled in
+
+(function () {
+  'use strict'
+
+  var script = document.currentScript
+  var url = script.getAttribute('data-url')
+  var message = script.getAttribute('data-message')
+
+  function showResult (input, available) {
+    var feedback = input.parentNode.querySelector('.availability-feedback')
+
+    if (available) {
+      input.classList.remove('is-invalid')
+      if (feedback) {
+        feedback.remove()
+      }
+      return
+    }
+
+    input.classList.add('is-invalid')
+    if (!feedback) {
+      feedback = document.createElement('div')
+      feedback.className = 'invalid-feedback availability-feedback'
+      feedback.textContent = message
+      input.parentNode.appendChild(feedback)
+    }
+  }
+
+  ['username', 'email'].forEach(function (name) {
+    var input = document.querySelector('form input[name="' + name + '"]')
+    if (!input) {
+      return
+    }
+
+    input.addEventListener('change', function () {
+      if (!input.value) {
+        return
+      }
+
+      fetch(url + '?' + name + '=' + encodeURIComponent(input.value))
+        .then(function (response) {
+          return response.ok ? response.json() : {}
+        })
+        .then(function (result) {
+          if (name in result) {
+            showResult(input, result[name])
+          }
+        })
+    })
+  })
+}())
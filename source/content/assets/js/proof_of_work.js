@@ -0,0 +1,51 @@
+// Finds a number whose SHA-256 hash together with the challenge starts with the
+// required number of zero bits before the form is submitted
+
+(function () {
+  'use strict'
+
+  var script = document.currentScript
+  var difficulty = parseInt(script.getAttribute('data-difficulty'), 10)
+  var form = script.closest('form')
+  var challenge = form.querySelector('[name="pow_challenge"]').value
+  var solution = form.querySelector('[name="pow_solution"]')
+  var encoder = new TextEncoder()
+
+  function hasLeadingZeros (bytes) {
+    for (var bit = 0; bit < difficulty; bit += 8) {
+      var bits = Math.min(8, difficulty - bit)
+      if (bytes[bit / 8] >> (8 - bits) !== 0) {
+        return false
+      }
+    }
+    return true
+  }
+
+  function solve (counter, done) {
+    var data = encoder.encode(challenge + ':' + counter)
+
+    crypto.subtle.digest('SHA-256', data).then(function (digest) {
+      if (hasLeadingZeros(new Uint8Array(digest))) {
+        done(counter)
+      } else {
+        solve(counter + 1, done)
+      }
+    })
+  }
+
+  form.addEventListener('submit', function (event) {
+    if (solution.value) {
+      return
+    }
+
+    event.preventDefault()
+    form.querySelectorAll('button').forEach(function (button) {
+      button.disabled = true
+    })
+
+    solve(0, function (counter) {
+      solution.value = counter
+      form.submit()
+    })
+  })
+})()
@@ -0,0 +1,118 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+
+LOW, NORMAL, HIGH = range(3)
+
+
+class AdaptiveLimit:
+    """
+    An AIMD concurrency limit: it grows by about one every `limit` fast responses and
+    shrinks by 10% (at most once per latency target) when a response is slower than
+    the target, which is a sign of requests queueing up for the CPU.
+    """
+
+    def __init__(self, initial, minimum, maximum, latency_target):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, share):
+        with self.lock:
+            if self.in_flight >= self.limit * share:
+                return False
+
+            self.in_flight += 1
+            return True
+
+    def release(self, latency):
+        now = time.monotonic()
+
+        with self.lock:
+            self.in_flight -= 1
+
+            if latency <= self.latency_target:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            elif now - self.last_decrease >= self.latency_target:
+                self.limit = max(self.minimum, self.limit * 0.9)
+                self.last_decrease = now
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Sheds the requests above an adaptive per-process concurrency limit with a fast 503.
+    The expensive guest-only endpoints are shed first, the critical views and the
+    authenticated requests last.
+
+    The requests are admitted in process_view, once the URL is resolved and the
+    session is authenticated, so a made-up session cookie doesn't raise the
+    priority of a request.
+
+    The limit counts the requests of one process, so it needs a threaded WSGI
+    server (gunicorn's gthread workers, uWSGI or mod_wsgi with threads). A process
+    serving one request at a time, like a sync worker or Django's sync middleware
+    under ASGI, never has another request in flight, so everything is admitted.
+    """
+
+    # The part of the limit each priority may use
+    shares = {LOW: 0.5, NORMAL: 1.0, HIGH: 2.0}
+
+    def __init__(self, get_response):
+        if not settings.CONCURRENCY_LIMIT_ENABLED:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.limit = AdaptiveLimit(
+            settings.CONCURRENCY_INITIAL_LIMIT,
+            settings.CONCURRENCY_MIN_LIMIT,
+            settings.CONCURRENCY_MAX_LIMIT,
+            settings.CONCURRENCY_LATENCY_TARGET,
+        )
+        self.sheddable_views = set(settings.CONCURRENCY_SHEDDABLE_VIEWS)
+        self.critical_views = set(settings.CONCURRENCY_CRITICAL_VIEWS)
+
+    def get_priority(self, request):
+        view_name = request.resolver_match.view_name
+
+        # Only the submissions are expensive, the forms themselves are cheap
+        if view_name in self.sheddable_views and request.method not in ("GET", "HEAD"):
+            return LOW
+
+        if view_name in self.critical_views:
+            return HIGH
+
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return HIGH
+
+        return NORMAL
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            started = getattr(request, "_concurrency_started", None)
+            if started is not None:
+                self.limit.release(time.monotonic() - started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not request.META.get("wsgi.multithread"):
+            return None
+
+        if not self.limit.acquire(self.shares[self.get_priority(request)]):
+            response = HttpResponse(
+                "Service temporarily overloaded.", status=503, content_type="text/plain"
+            )
+            response["Retry-After"] = str(settings.CONCURRENCY_RETRY_AFTER)
+            return response
+
+        request._concurrency_started = time.monotonic()
+        return None
@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.conf.urls.i18n import is_language_prefix_patterns_used
+from django.middleware.locale import LocaleMiddleware as BaseLocaleMiddleware
+from django.utils import translation
+from django.utils.translation import trans_real
+
+cache: OrderedDict = OrderedDict()
+lock = threading.Lock()
+
+
+def preload_catalogs():
+    # Loads and merges the catalogs of every language once, instead of on the first
+    # request in that language. Django keeps them for the process, it's the same
+    # call activate() makes
+    for code, _name in settings.LANGUAGES:
+        trans_real.translation(code)
+
+
+def negotiate_language(request):
+    """
+    Returns the language of the request, memoized per language cookie and
+    Accept-Language header in a bounded LRU.
+    """
+    key = (
+        request.COOKIES.get(settings.LANGUAGE_COOKIE_NAME),
+        request.META.get("HTTP_ACCEPT_LANGUAGE", ""),
+    )
+
+    with lock:
+        language = cache.get(key)
+        if language is not None:
+            cache.move_to_end(key)
+            return language
+
+    language = translation.get_language_from_request(request)
+
+    with lock:
+        cache[key] = language
+        while len(cache) > settings.LOCALE_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    return language
+
+
+class LocaleMiddleware(BaseLocaleMiddleware):
+    """
+    Django's LocaleMiddleware with a memoized negotiation and catalogs preloaded when
+    the handler is built. The URLs prefixed with a language are left to Django.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+
+        if settings.LOCALE_PRELOAD_CATALOGS:
+            preload_catalogs()
+
+    def process_request(self, request):
+        urlconf = getattr(request, "urlconf", settings.ROOT_URLCONF)
+        if is_language_prefix_patterns_used(urlconf)[0]:
+            return super().process_request(request)
+
+        translation.activate(negotiate_language(request))
+        request.LANGUAGE_CODE = translation.get_language()
@@ -0,0 +1,59 @@
+import io
+import pstats
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main.profiling import HEADER, make_profile_token
+
+
+class Command(BaseCommand):
+    help = "Aggregates the collected request profiles into a top functions report."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "views",
+            nargs="*",
+            help="URL names to report on, like accounts:log_in. All by default.",
+        )
+        parser.add_argument(
+            "--sort",
+            choices=["cumulative", "tottime", "ncalls"],
+            default="cumulative",
+        )
+        parser.add_argument("--limit", type=int, default=25)
+        parser.add_argument(
+            "--issue-token",
+            action="store_true",
+            help=f"Print a signed {HEADER} header value that forces profiling.",
+        )
+
+    def handle(self, *args, **options):
+        if options["issue_token"]:
+            self.stdout.write(f"{HEADER}: {make_profile_token()}")
+            return
+
+        directory = settings.PROFILING_DIR
+        names = [view.replace(":", ".") for view in options["views"]]
+        if not names:
+            names = sorted(path.name for path in directory.glob("*") if path.is_dir())
+
+        if not names:
+            raise CommandError(f"No profiles found in {directory}.")
+
+        for name in names:
+            profiles = sorted((directory / name).glob("*.prof"))
+            if not profiles:
+                self.stderr.write(f"No profiles found for {name}.")
+                continue
+
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(f"{name} ({len(profiles)} profiles)")
+            )
+
+            # OutputWrapper ends every write with a newline, so pstats writes to a buffer
+            stream = io.StringIO()
+            stats = pstats.Stats(*map(str, profiles), stream=stream)
+            stats.strip_dirs().sort_stats(options["sort"]).print_stats(options["limit"])
+
+            self.stdout.write(stream.getvalue())
@@ -0,0 +1,317 @@
+import http.client
+import json
+import queue
+import random
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from accounts.models import User, users_updated
+from accounts.views import LogInView
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import NoReverseMatch, reverse
+from django.utils.crypto import get_random_string
+
+from main.traffic import read_traffic
+
+CSRF_TOKEN = get_random_string(32)
+
+SIGN_UP_VIEWS = {"accounts:sign_up", "accounts:api_sign_up"}
+
+
+def seed_users(count, password):
+    """
+    Creates the missing synthetic users replay-0 to replay-N and sets a new password
+    on all of them.
+    """
+    users = [
+        User(
+            username=f"replay-{i}",
+            email=f"replay-{i}@example.com",
+            is_active=True,
+        )
+        for i in range(count)
+    ]
+    User.objects.bulk_create(users, batch_size=1000, ignore_conflicts=True)
+
+    synthetic = User.objects.filter(username__startswith="replay-")
+    synthetic.update(password=make_password(password))
+
+    # The bulk writes send no post_save, refresh the user cache and existence index
+    rows = list(synthetic.values_list("pk", "username", "email"))
+    users_updated.send(
+        sender=User,
+        user_ids=[pk for pk, _, _ in rows],
+        usernames=[username for _, username, _ in rows],
+        emails=[email for _, _, email in rows],
+    )
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Client:
+    """A replaying client with a guest and a logged-in cookie jar."""
+
+    def __init__(self, base_url, user, password):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port
+        self.user = user
+        self.password = password
+
+        self.cookies = {False: {"csrftoken": CSRF_TOKEN}, True: None}
+        self.token = None
+
+    def request(
+        self, method, path, data=None, json_body=False, user=False, headers=None
+    ):
+        headers = dict(headers or {})
+        cookies = self.cookies[user]
+        headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in cookies.items())
+
+        if self.token and json_body and user:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        body = None
+        if data is not None:
+            if json_body:
+                body = json.dumps(data)
+                headers["Content-Type"] = "application/json"
+            else:
+                # The token is rotated on log-in, the cookie holds the current one
+                token = cookies["csrftoken"]
+                body = urlencode({**data, "csrfmiddlewaretoken": token})
+                headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+            content = response.read()
+        finally:
+            connection.close()
+
+        for header in response.headers.get_all("Set-Cookie") or []:
+            for name, morsel in SimpleCookie(header).items():
+                cookies[name] = morsel.value
+
+        return response.status, content
+
+    def log_in(self, api):
+        fields = LogInView.get_form_class()().fields
+        data = {name: self.get_value(name, None) for name in fields}
+        data.pop("remember_me", None)
+
+        if api:
+            self.cookies[True] = self.cookies[True] or {"csrftoken": CSRF_TOKEN}
+            _, content = self.request(
+                "POST", reverse("accounts:api_log_in"), data, json_body=True
+            )
+            self.token = json.loads(content).get("token")
+        else:
+            self.cookies[True] = {"csrftoken": CSRF_TOKEN}
+            self.request("POST", reverse("accounts:log_in"), data, user=True)
+
+    def get_value(self, name, view_name, fresh="", invalid=False):
+        if view_name in SIGN_UP_VIEWS or "change_email" in (view_name or ""):
+            if name == "username":
+                return fresh
+            if name == "email":
+                return f"{fresh}@example.com"
+
+        if name in ("username", "email_or_username"):
+            return self.user.username
+        if name == "email":
+            return self.user.email
+        if "password" in name:
+            return self.password[::-1] if invalid else self.password
+        if name == "language":
+            return random.choice(settings.LANGUAGES)[0]
+        if name == "remember_me":
+            return "on"
+
+        return "Replay"
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays the requests captured by TrafficCaptureMiddleware against a running "
+        "instance and reports the latency distribution per URL name."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "files",
+            nargs="*",
+            help="Captured files, all of TRAFFIC_CAPTURE_DIR by default.",
+        )
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--speed",
+            type=float,
+            default=1.0,
+            help="Replay speed relative to the capture, 0 replays without pauses.",
+        )
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--seed-users",
+            type=int,
+            default=0,
+            help="Create this many synthetic users (replay-N) before replaying.",
+        )
+        parser.add_argument("--limit", type=int, help="Replay only the first requests.")
+        parser.add_argument(
+            "--i-know-this-is-not-production",
+            action="store_true",
+            dest="not_production",
+            help="Run with DEBUG off.",
+        )
+
+    def handle(self, *args, **options):
+        # The replay creates active users with a known password and signs up more
+        if not settings.DEBUG and not options["not_production"]:
+            raise CommandError(
+                "The replay writes synthetic users into the database, it only runs "
+                "with DEBUG on or with --i-know-this-is-not-production."
+            )
+
+        files = options["files"] or sorted(settings.TRAFFIC_CAPTURE_DIR.glob("*.jsonl"))
+        entries = read_traffic(files)[: options["limit"]]
+        if not entries:
+            raise CommandError("No captured requests found.")
+
+        password = get_random_string(20)
+        seed_users(options["seed_users"], password)
+
+        users = list(User.objects.filter(username__startswith="replay-")[:10000])
+        if not users:
+            raise CommandError("No synthetic users, run with --seed-users first.")
+
+        self.stdout.write(f"The synthetic users replay-N have the password {password}")
+
+        self.results = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.skipped = Counter()
+        self.lock = threading.Lock()
+
+        requests = queue.Queue()
+        for entry in entries:
+            requests.put(entry)
+
+        speed = options["speed"]
+        started = time.monotonic()
+        first = entries[0]["t"]
+
+        def worker(number):
+            client = Client(options["base_url"], users[number % len(users)], password)
+            while True:
+                try:
+                    entry = requests.get_nowait()
+                except queue.Empty:
+                    return
+
+                if speed:
+                    delay = (entry["t"] - first) / speed - (time.monotonic() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+
+                self.replay(client, entry)
+
+        threads = [
+            threading.Thread(target=worker, args=[number])
+            for number in range(options["concurrency"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.report(entries, time.monotonic() - started)
+
+    def replay(self, client, entry):
+        view_name = entry["v"]
+        kwargs = {name: get_random_string(20) for name in entry["k"]}
+        try:
+            path = reverse(view_name, kwargs=kwargs)
+        except NoReverseMatch:
+            with self.lock:
+                self.skipped[view_name] += 1
+            return
+
+        api = view_name.startswith("accounts:api_")
+        user = bool(entry["a"])
+
+        # Every guest request comes from a new visitor
+        if not user:
+            client.cookies[False] = {"csrftoken": CSRF_TOKEN}
+
+        if user and (client.token is None if api else client.cookies[True] is None):
+            client.log_in(api)
+
+        data = None
+        if entry["m"] == "POST":
+            # A rejected submission is replayed with a wrong password
+            invalid = entry["s"] == 400 if api else entry["s"] == 200
+            fresh = f"replay-{get_random_string(12).lower()}"
+            data = {
+                name: client.get_value(name, view_name, fresh, invalid)
+                for name in entry["f"]
+            }
+
+        headers = {"Accept-Language": entry["l"]} if entry["l"] else {}
+
+        request_started = time.monotonic()
+        try:
+            status, _ = client.request(
+                entry["m"], path, data, json_body=api, user=user, headers=headers
+            )
+        except OSError as e:
+            status = type(e).__name__
+        duration = (time.monotonic() - request_started) * 1000
+
+        # Logging out ends the session of the client
+        if view_name in ("accounts:log_out", "accounts:api_log_out"):
+            client.cookies[True] = None
+            client.token = None
+
+        with self.lock:
+            self.results[view_name].append((duration, entry["d"]))
+            self.statuses[view_name][status] += 1
+
+    def report(self, entries, elapsed):
+        replayed = sum(len(results) for results in self.results.values())
+        self.stdout.write(
+            f"{replayed} of {len(entries)} requests replayed in {elapsed:.1f} s "
+            f"({replayed / elapsed:.1f} per second)\n"
+        )
+
+        self.stdout.write(
+            f"{'URL name':40} {'count':>6} {'p50':>8} {'p90':>8} {'p99':>8} "
+            f"{'max':>8} {'captured p50':>13}  statuses"
+        )
+        for view_name in sorted(self.results):
+            durations = sorted(duration for duration, _ in self.results[view_name])
+            captured = statistics.median(d for _, d in self.results[view_name])
+            statuses = " ".join(
+                f"{status}x{count}"
+                for status, count in sorted(self.statuses[view_name].items(), key=str)
+            )
+            self.stdout.write(
+                f"{view_name:40} {len(durations):>6} "
+                f"{percentile(durations, 0.5):>6.1f}ms "
+                f"{percentile(durations, 0.9):>6.1f}ms "
+                f"{percentile(durations, 0.99):>6.1f}ms "
+                f"{durations[-1]:>6.1f}ms {captured:>11.1f}ms  {statuses}"
+            )
+
+        for view_name, count in sorted(self.skipped.items()):
+            self.stdout.write(
+                self.style.WARNING(f"Skipped {count} requests of {view_name}.")
+            )
@@ -0,0 +1,106 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+MEMORY_PROBE = """
+import json, resource, tracemalloc
+tracemalloc.start()
+import app.wsgi
+current, peak = tracemalloc.get_traced_memory()
+print(json.dumps({
+    "current": current,
+    "peak": peak,
+    "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports import time and memory of the app.settings -> app.wsgi startup path."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--import-budget",
+            type=float,
+            default=settings.STARTUP_IMPORT_TIME_BUDGET,
+            help="Import time budget in milliseconds.",
+        )
+        parser.add_argument(
+            "--memory-budget",
+            type=float,
+            default=settings.STARTUP_MEMORY_BUDGET,
+            help="Traced allocations budget in megabytes.",
+        )
+        parser.add_argument(
+            "--top", type=int, default=15, help="Number of slowest modules to show."
+        )
+
+    def run_probe(self, *args):
+        env = {**os.environ, "PYTHONPATH": str(settings.BASE_DIR)}
+        env.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+
+        result = subprocess.run(
+            [sys.executable, *args],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"The startup probe failed:\n{result.stderr}")
+
+        return result
+
+    def handle(self, *args, **options):
+        # Import times and memory are measured in separate interpreters, tracemalloc
+        # slows the imports down noticeably.
+        result = self.run_probe("-X", "importtime", "-c", "import app.wsgi")
+
+        modules = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:") :].split("|")
+            modules.append((int(self_us), int(cumulative_us), name.strip()))
+
+        import_time = sum(self_us for self_us, _, _ in modules) / 1000
+
+        memory = json.loads(self.run_probe("-c", MEMORY_PROBE).stdout)
+        peak = memory["peak"] / 1024 / 1024
+        max_rss = memory["max_rss"] / 1024 / 1024
+
+        self.stdout.write(f"Settings module: {os.environ['DJANGO_SETTINGS_MODULE']}")
+        self.stdout.write(f"Installed apps: {len(settings.INSTALLED_APPS)}")
+        self.stdout.write(f"Imported modules: {len(modules)}")
+        self.stdout.write(
+            f"Import time: {import_time:.1f} ms (budget {options['import_budget']:.0f} ms)"
+        )
+        self.stdout.write(
+            f"Traced allocations peak: {peak:.1f} MB (budget {options['memory_budget']:.0f} MB)"
+        )
+        self.stdout.write(f"Max RSS: {max_rss:.1f} MB")
+
+        self.stdout.write("")
+        self.stdout.write("Slowest modules (self / cumulative, ms):")
+        for self_us, cumulative_us, name in sorted(modules, reverse=True)[
+            : options["top"]
+        ]:
+            self.stdout.write(
+                f"  {self_us / 1000:8.2f} {cumulative_us / 1000:8.2f}  {name}"
+            )
+
+        errors = []
+        if import_time > options["import_budget"]:
+            errors.append(f"import time {import_time:.1f} ms")
+        if peak > options["memory_budget"]:
+            errors.append(f"traced allocations {peak:.1f} MB")
+        if errors:
+            raise CommandError(f"Startup budget exceeded: {', '.join(errors)}.")
+
+        self.stdout.write(self.style.SUCCESS("Startup is within the budget."))
@@ -0,0 +1,91 @@
+import cProfile
+import itertools
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+SALT = "main.profiling"
+HEADER = "X-Profile"
+
+# Only one profiler can be active in a process at a time
+profiler_lock = threading.Lock()
+
+
+def make_profile_token():
+    return signing.TimestampSigner(salt=SALT).sign("profile")
+
+
+def is_valid_profile_token(token):
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_AGE
+        )
+    except signing.BadSignature:
+        return False
+
+    return True
+
+
+class ProfilingMiddleware:
+    """
+    Profiles one request in PROFILING_SAMPLE_RATE, and every request carrying a signed
+    X-Profile header, writing a cProfile dump per URL name into PROFILING_DIR.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.counter = itertools.count(1)
+
+    def should_profile(self, request):
+        token = request.headers.get(HEADER)
+        if token:
+            return is_valid_profile_token(token)
+
+        rate = settings.PROFILING_SAMPLE_RATE
+        return bool(rate) and next(self.counter) % rate == 0
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        # Requests overlapping a profiled one are served unprofiled
+        if not profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            profiler = cProfile.Profile()
+            try:
+                # Another profiling tool is active, e.g. a debugger on Python 3.12+
+                profiler.enable()
+            except ValueError:
+                return self.get_response(request)
+
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        finally:
+            profiler_lock.release()
+
+        match = request.resolver_match
+        self.save(profiler, match.view_name if match else "unresolved")
+
+        return response
+
+    @staticmethod
+    def save(profiler, view_name):
+        directory = settings.PROFILING_DIR / view_name.replace(":", ".")
+        directory.mkdir(parents=True, exist_ok=True)
+
+        profiler.dump_stats(directory / f"{time.time_ns()}.prof")
+
+        # Keep only the latest profiles of the view
+        profiles = sorted(directory.glob("*.prof"))
+        for path in profiles[: -settings.PROFILING_KEEP]:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,142 @@
+import threading
+
+from django.http import HttpResponse
+from django.test import Client, SimpleTestCase, override_settings
+from django.urls import path
+
+from main.concurrency import AdaptiveLimit
+
+entered = threading.Semaphore(0)
+finish = threading.Event()
+
+
+def blocking_view(request):
+    entered.release()
+    finish.wait(5)
+    return HttpResponse("blocked")
+
+
+def fast_view(request):
+    return HttpResponse("fast")
+
+
+urlpatterns = [
+    path("blocking/", blocking_view, name="blocking"),
+    path("sheddable/", fast_view, name="sheddable"),
+    path("critical/", fast_view, name="critical"),
+    path("normal/", fast_view, name="normal"),
+]
+
+
+class AdaptiveLimitTests(SimpleTestCase):
+    def test_shares(self):
+        limit = AdaptiveLimit(4, minimum=2, maximum=8, latency_target=1)
+
+        self.assertEqual([limit.acquire(0.5) for _ in range(3)], [True, True, False])
+        self.assertEqual([limit.acquire(1) for _ in range(3)], [True, True, False])
+        self.assertEqual([limit.acquire(2) for _ in range(5)], [True] * 4 + [False])
+
+    def test_aimd(self):
+        limit = AdaptiveLimit(4, minimum=2, maximum=5, latency_target=1)
+
+        for _ in range(4):
+            limit.acquire(1)
+            limit.release(0.1)
+        self.assertAlmostEqual(limit.limit, 5, delta=0.1)
+
+        for _ in range(20):
+            limit.acquire(1)
+            limit.release(0.1)
+        self.assertEqual(limit.limit, 5)
+
+        # A slow response shrinks the limit once per latency target
+        limit.acquire(1)
+        limit.release(2)
+        limit.acquire(1)
+        limit.release(2)
+        self.assertEqual(limit.limit, 4.5)
+        self.assertEqual(limit.in_flight, 0)
+
+        limit.last_decrease = 0
+        for _ in range(10):
+            limit.acquire(1)
+            limit.release(2)
+            limit.last_decrease = 0
+        self.assertEqual(limit.limit, 2)
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    CONCURRENCY_LIMIT_ENABLED=True,
+    CONCURRENCY_INITIAL_LIMIT=2,
+    CONCURRENCY_MIN_LIMIT=2,
+    CONCURRENCY_MAX_LIMIT=2,
+    CONCURRENCY_LATENCY_TARGET=60,
+    CONCURRENCY_SHEDDABLE_VIEWS=["sheddable"],
+    CONCURRENCY_CRITICAL_VIEWS=["critical"],
+)
+class ConcurrencyLimitMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        # One handler, so the threads share the middleware and its limit. It's
+        # loaded by the first request, before the threads race to load it
+        self.client = Client()
+        self.client.get("/normal/")
+        finish.clear()
+
+    def request(self, method, name, multithread=True):
+        return getattr(self.client, method)(
+            f"/{name}/", **{"wsgi.multithread": multithread}
+        )
+
+    def block(self, count, multithread=True):
+        """Keeps `count` requests in flight until finish is set."""
+        threads = [
+            threading.Thread(target=self.request, args=["get", "blocking", multithread])
+            for _ in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for _ in threads:
+            self.assertTrue(entered.acquire(timeout=5))
+
+        def release():
+            finish.set()
+            for thread in threads:
+                thread.join()
+
+        self.addCleanup(release)
+        return release
+
+    def test_priorities(self):
+        release = self.block(2)
+
+        # The limit is full: the critical views may use twice of it, the sheddable
+        # submissions only half
+        self.assertEqual(self.request("get", "critical").status_code, 200)
+        self.assertEqual(self.request("get", "normal").status_code, 503)
+        self.assertEqual(self.request("post", "sheddable").status_code, 503)
+        self.assertEqual(self.request("get", "sheddable").status_code, 503)
+
+        response = self.request("post", "sheddable")
+        self.assertEqual(response["Retry-After"], "2")
+
+        release()
+        self.assertEqual(self.request("post", "sheddable").status_code, 200)
+        self.assertEqual(self.request("get", "normal").status_code, 200)
+
+    def test_sheddable_first(self):
+        release = self.block(1)
+
+        # The sheddable forms are cheap to show, only their submissions are shed
+        self.assertEqual(self.request("post", "sheddable").status_code, 503)
+        self.assertEqual(self.request("get", "sheddable").status_code, 200)
+        self.assertEqual(self.request("get", "normal").status_code, 200)
+
+        release()
+
+    def test_single_threaded(self):
+        # A sync worker serves one request at a time, nothing is shed
+        self.block(3, multithread=False)
+
+        self.assertEqual(self.request("post", "sheddable", False).status_code, 200)
+        self.assertEqual(self.request("get", "normal", False).status_code, 200)
@@ -0,0 +1,18 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from django.utils.translation import trans_real
+
+from main.locale import preload_catalogs
+
+
+class PreloadCatalogsTests(SimpleTestCase):
+    def test_preload(self):
+        with mock.patch.object(trans_real, "_translations", {}):
+            preload_catalogs()
+
+            self.assertEqual(
+                set(trans_real._translations), {code for code, _ in settings.LANGUAGES}
+            )
+            self.assertEqual(trans_real._translations["fr"].gettext("Email"), "E-mail")
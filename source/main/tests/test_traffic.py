@@ -0,0 +1,126 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from accounts.models import User
+from django.core.management import CommandError, call_command
+from django.test import Client, LiveServerTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from main.traffic import read_traffic
+
+HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+class TrafficDirMixin:
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS, LOGIN_VIA_EMAIL=True)
+class TrafficCaptureTests(TrafficDirMixin, TestCase):
+    def capture(self, **settings):
+        with override_settings(
+            TRAFFIC_CAPTURE_ENABLED=True, TRAFFIC_CAPTURE_DIR=self.directory, **settings
+        ):
+            client = Client()
+            client.get(reverse("index"))
+            client.post(
+                reverse("accounts:log_in"),
+                {"email": "foo@example.com", "password": "secret-Pa55word"},
+            )
+            client.get(reverse("index"))
+
+    def test_capture(self):
+        User.objects.create_user("foo", "foo@example.com", "secret-Pa55word")
+
+        self.capture()
+
+        files = list(self.directory.glob("*.jsonl"))
+        self.assertEqual(len(files), 1)
+        self.assertNotIn("secret-Pa55word", files[0].read_text())
+
+        entries = read_traffic(files)
+        self.assertEqual(
+            [(e["v"], e["m"], e["s"], e["a"]) for e in entries],
+            [
+                ("index", "GET", 200, 0),
+                ("accounts:log_in", "POST", 302, 0),
+                ("index", "GET", 200, 1),
+            ],
+        )
+        self.assertEqual(entries[1]["f"], ["email", "password"])
+
+    def test_rotation(self):
+        self.capture(TRAFFIC_CAPTURE_MAX_SIZE=1)
+
+        files = sorted(path.name for path in self.directory.iterdir())
+        self.assertEqual(len(files), 2)
+        self.assertTrue(files[0].endswith(".jsonl"))
+        self.assertTrue(files[1].endswith(".old.jsonl"))
+        self.assertEqual(len(read_traffic(self.directory.glob("*.jsonl"))), 2)
+
+
+@override_settings(PASSWORD_HASHERS=HASHERS, LOGIN_VIA_EMAIL=True)
+class ReplayTrafficTests(TrafficDirMixin, LiveServerTestCase):
+    def write_capture(self):
+        entries = [
+            {"v": "index", "k": [], "m": "GET", "f": [], "s": 200, "a": 0},
+            {
+                "v": "accounts:log_in",
+                "k": [],
+                "m": "POST",
+                "f": ["email", "password"],
+                "s": 302,
+                "a": 0,
+            },
+            {"v": "accounts:change_profile", "k": [], "m": "GET", "f": [], "s": 200},
+            {"v": "accounts:activate", "k": ["code"], "m": "GET", "f": [], "s": 404},
+            {"v": "gone", "k": [], "m": "GET", "f": [], "s": 200, "a": 0},
+        ]
+        path = self.directory / "1.jsonl"
+        with open(path, "w") as f:
+            for t, entry in enumerate(entries):
+                entry = {"t": t, "d": 1.0, "l": "en", "a": 1} | entry
+                f.write(json.dumps(entry) + "\n")
+
+        return str(path)
+
+    def replay(self, **options):
+        stdout = io.StringIO()
+        call_command(
+            "replay_traffic",
+            self.write_capture(),
+            base_url=self.live_server_url,
+            speed=0,
+            concurrency=2,
+            stdout=stdout,
+            **options,
+        )
+        return stdout.getvalue()
+
+    def test_refuses_without_debug(self):
+        with self.assertRaises(CommandError):
+            self.replay(seed_users=2)
+
+        self.assertFalse(User.objects.exists())
+
+    def test_replay(self):
+        output = self.replay(seed_users=2, not_production=True)
+
+        self.assertIn("4 of 5 requests replayed", output)
+        self.assertIn("Skipped 1 requests of gone.", output)
+        self.assertRegex(output, r"accounts:log_in .* 302x1")
+        self.assertRegex(output, r"accounts:activate .* 404x1")
+        self.assertNotIn("500x", output)
+
+        self.assertEqual(User.objects.filter(username__startswith="replay-").count(), 2)
+
+        # The users get a new random password on every run
+        password = output.split("password ")[1].split()[0]
+        user = User.objects.get(username="replay-0")
+        self.assertTrue(user.check_password(password))
+        self.assertTrue(user.is_active)
@@ -0,0 +1,116 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# Fields that only carry the CSRF token or the redirect target
+IGNORED_FIELDS = {"csrfmiddlewaretoken", "next"}
+
+
+class TrafficCaptureMiddleware:
+    """
+    Appends the shape of every request to a JSON lines file per process in
+    TRAFFIC_CAPTURE_DIR, for `manage.py replay_traffic`. Only the URL name, the
+    names of the URL arguments and of the submitted fields, the method, status,
+    duration, language and whether the user was logged in before the view are
+    recorded, never the values.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TRAFFIC_CAPTURE_ENABLED:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.file = None
+        self.path = None
+        self.size = 0
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        started = time.time()
+        response = self.get_response(request)
+        duration = time.time() - started
+
+        match = request.resolver_match
+        if match is None:
+            return response
+
+        entry = {
+            "t": round(started, 3),
+            "v": match.view_name,
+            "k": sorted(match.kwargs),
+            "m": request.method,
+            "f": self.get_fields(request),
+            "s": response.status_code,
+            "d": round(duration * 1000, 2),
+            "l": getattr(request, "LANGUAGE_CODE", ""),
+            "a": int(getattr(request, "_traffic_authenticated", False)),
+        }
+        self.write(json.dumps(entry, separators=(",", ":")))
+
+        return response
+
+    @staticmethod
+    def process_view(request, view_func, view_args, view_kwargs):
+        # The log-in and log-out views change the user, keep the state they started with
+        user = getattr(request, "user", None)
+        request._traffic_authenticated = bool(user and user.is_authenticated)
+
+    @staticmethod
+    def get_fields(request):
+        if request.method != "POST":
+            return []
+
+        if request.content_type == "application/json":
+            try:
+                data = json.loads(request.body)
+            except ValueError:
+                return []
+            fields = data if isinstance(data, dict) else {}
+        else:
+            fields = request.POST
+
+        return sorted(set(fields) - IGNORED_FIELDS)
+
+    def write(self, line):
+        with self.lock:
+            # Every worker writes its own file, the file objects don't survive a fork
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.open()
+                atexit.register(lambda: self.file.close())
+
+            # A full file replaces the previous one of the process, so every process
+            # keeps at most twice TRAFFIC_CAPTURE_MAX_SIZE bytes
+            if self.size >= settings.TRAFFIC_CAPTURE_MAX_SIZE:
+                self.file.close()
+                os.replace(self.path, self.path.with_suffix(".old.jsonl"))
+                self.open()
+
+            # The lines are ASCII, json.dumps escapes the rest
+            self.file.write(line + "\n")
+            self.size += len(line) + 1
+
+    def open(self):
+        directory = settings.TRAFFIC_CAPTURE_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+
+        # Line buffered, so a capture can be read while it is being written
+        self.path = directory / f"{self.pid}.jsonl"
+        self.file = open(self.path, "a", buffering=1)
+        self.size = self.file.tell()
+
+
+def read_traffic(paths):
+    """Returns the captured requests of all the files ordered by time."""
+    entries = []
+    for path in paths:
+        with open(path) as f:
+            entries.extend(json.loads(line) for line in f if line.strip())
+
+    return sorted(entries, key=lambda entry: entry["t"])